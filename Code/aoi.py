@@ -0,0 +1,178 @@
+'''
+Areas of interest on the feedback screen, laid out the way
+FeedbackScreen lays out its table, for telling which one a gaze sample
+falls in: live, one sample at a time, or for a whole recording at once.
+
+The codes are those of RawData/AOI_description.txt: column_row, with
+column 1 the contributions, 2 the labels and 3 the payoffs, wherever
+FeedbackScreen.reversed puts them, and row 1 the header, 2 the
+participant, then the other players, the sum and the average. The
+continue button is 4_0, and a sample in none of them is None.
+'''
+
+from hit_test import SpatialHash, TableIndex
+
+CONTRIBUTIONS_COLUMN = 1
+LABELS_COLUMN = 2
+PAYOFFS_COLUMN = 3
+NEXT = u'4_0'
+NONE = u'None'
+
+# The size button.Button gives the continue button by default, for
+# when there is no Button to ask, e.g. offline.
+BUTTON_SIZE = (85, 35)
+
+
+def feedback_layout(width, height, margin, num_players, feedback_cfg,
+                    reversed_, top=None):
+    '''Where FeedbackScreen puts its table, in pixels from the top
+    left of the screen: ([x of the contributions, labels and payoffs
+    columns], [y of each row]).
+
+    Keyword arguments:
+    width, height, margin -- of the screen, in pixels
+    num_players -- players in a group
+    feedback_cfg -- the feedback_screen section of the config
+    reversed_ -- FeedbackScreen.reversed, as written to the details
+        file as summary_scr_reversed
+    top -- y of the header row (default {margin}); FeedbackScreen
+        puts it at the window's margin even when given another margin
+    '''
+    col_x_list = [_cfg_2_pix(width, margin, feedback_cfg[u'left_col_x']),
+                  _cfg_2_pix(width, margin, feedback_cfg[u'midd_col_x']),
+                  _cfg_2_pix(width, margin, feedback_cfg[u'rite_col_x'])]
+    if reversed_:
+        col_x_list.reverse()
+    nrows = num_players + 3
+    if top is None:
+        top = margin
+    row_spacing = (height - 2*margin)/(nrows-1)
+    row_ys = [top + i*row_spacing for i in range(nrows)]
+    return col_x_list, row_ys
+
+
+def feedback_aois(width, height, margin, num_players, feedback_cfg,
+                  reversed_, cell_size=None, button_size=BUTTON_SIZE):
+    '''The AOIMap of the feedback screen; see feedback_layout() for the
+    arguments. The table's cells reach halfway to their neighbours,
+    or are at most {cell_size}, (width, height), if given. The
+    continue button is {button_size}, (width, height).
+    '''
+    col_x_list, row_ys = feedback_layout(width, height, margin, num_players,
+                                         feedback_cfg, reversed_)
+    return table_aois(col_x_list, row_ys,
+                      button_pos=(width - 2*margin, height - 2*margin),
+                      cell_size=cell_size, button_size=button_size)
+
+
+def table_aois(col_x_list, row_ys, button_pos=None, cell_size=None,
+               button_size=BUTTON_SIZE):
+    '''The AOIMap of a table with its contributions, labels and payoffs
+    columns at {col_x_list}, its rows at {row_ys} and the continue
+    button, if any, centred on {button_pos} and {button_size},
+    (width, height).
+    '''
+    columns = zip((CONTRIBUTIONS_COLUMN, LABELS_COLUMN, PAYOFFS_COLUMN),
+                  col_x_list)
+    rows = [(i + 1, y) for i, y in enumerate(row_ys)]
+    extras = []
+    if button_pos is not None:
+        x, y = button_pos
+        half_width, half_height = button_size[0]/2.0, button_size[1]/2.0
+        extras.append((NEXT, (x - half_width, y - half_height,
+                              x + half_width, y + half_height)))
+    return AOIMap(columns, rows, extras, cell_size)
+
+
+class AOIMap(object):
+
+    '''A table of AOIs, plus any others on top of it, looked up with
+    hit_test: the table's cells with a TableIndex, so finding the AOI
+    of a sample takes two bisections and finding those of a whole
+    recording a couple of NumPy searchsorted() calls, and the others
+    with a SpatialHash.
+    '''
+
+    def __init__(self, columns, rows, extras=(), cell_size=None):
+        '''Initialize the class.
+
+        Keyword arguments:
+        columns -- [(column number, x of its centre)], in any order
+        rows -- [(row number, y of its centre)], in any order
+        extras -- [(code, (left, top, right, bottom))] of AOIs that
+            are checked before the table, like the continue button
+            (default none)
+        cell_size -- (width, height) that the table's cells are at
+            most (default None, they reach halfway to their neighbours)
+        '''
+        columns, rows = list(columns), list(rows)
+        self.table = TableIndex([x for _, x in columns], [y for _, y in rows],
+                                cell_size)
+        self.extras = list(extras)
+        # The first extra given wins, and a SpatialHash gives the last.
+        self._extras = SpatialHash()
+        for code, box in reversed(self.extras):
+            self._extras.add(code, box)
+        self.codes = [code for code, _ in self.extras]
+        self._table = []
+        for col, _ in columns:
+            self._table.append([u'{}_{}'.format(col, row) for row, _ in rows])
+            self.codes.extend(self._table[-1])
+
+    def code_at(self, x, y):
+        '''The code of the AOI that (x, y) is in, or NONE.'''
+        code = self._extras.hit((x, y))
+        if code is not None:
+            return code
+        cell = self.table.cell((x, y))
+        if cell is None:
+            return NONE
+        return self._table[cell[0]][cell[1]]
+
+    def codes_at(self, xs, ys):
+        '''The codes of the AOIs that the samples at {xs}, {ys} are in,
+        as a NumPy array of strings. NaNs are in NONE.
+        '''
+        # Only analysis code needs NumPy, the screens do not.
+        import numpy
+
+        xs = numpy.asarray(xs, dtype=float)
+        ys = numpy.asarray(ys, dtype=float)
+        codes = numpy.array(self.codes + [NONE])
+        ids = numpy.empty(xs.shape, dtype=int)
+        ids.fill(len(self.codes))
+        cols, rows = self.table.cells(xs, ys)
+        in_table = cols >= 0
+        ids[in_table] = (len(self.extras) +
+                         cols[in_table]*self.table.nrows + rows[in_table])
+        for index in reversed(range(len(self.extras))):
+            left, top, right, bottom = self.extras[index][1]
+            ids[(left <= xs) & (xs < right) & (top <= ys) & (ys < bottom)] = \
+                    index
+        return codes[ids]
+
+    def codes_of_frames(self, frames):
+        '''codes_at() the average gaze of {frames}, as returned by
+        recorders.read_binary_frames().
+        '''
+        return self.codes_at(frames['avg_x'], frames['avg_y'])
+
+    def boxes(self):
+        '''[(code, (left, top, right, bottom))] of every AOI, the extras
+        first.
+        '''
+        boxes = list(self.extras)
+        for col, codes in enumerate(self._table):
+            for row, code in enumerate(codes):
+                boxes.append((code, self.table.box(col, row)))
+        return boxes
+
+
+def _cfg_2_pix(dimension, margin, cfg_val):
+    # As Screen._cfg_2_pix()
+    if cfg_val < 0:
+        return dimension + cfg_val
+    elif cfg_val <= 1:
+        return margin + cfg_val*(dimension - 2*margin)
+    else:
+        return cfg_val
@@ -0,0 +1,128 @@
+'''
+Time to find the AOI of gaze samples on the feedback screen with
+aoi.AOIMap: one at a time, as the live overlay does, against testing
+every AOI's box in turn, and a whole recording at once with NumPy,
+against a loop over its samples.
+
+The map is made from the layout in EyeGames.cfg on a 1920 x 1080
+screen, both ways round, and checked to give only the codes in
+RawData/AOI_description.txt and the same code both ways for every
+sample. The NumPy part is skipped if NumPy is not installed. Results
+are printed (or written with --output) as JSON:
+
+    python benchmarks/bench_aoi.py
+'''
+
+import argparse
+import json
+import os
+import sys
+from random import Random
+from time import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import aoi
+
+WIDTH, HEIGHT, MARGIN, NUM_PLAYERS = 1920, 1080, 100, 2
+FEEDBACK_CFG = {u'left_col_x': 0.25, u'midd_col_x': 0.5, u'rite_col_x': 0.75}
+AOI_DESCRIPTION = os.path.join(os.path.dirname(os.path.dirname(HERE)),
+                               'DataAnalysis', 'RawData', 'AOI_description.txt')
+
+
+def scan(boxes, x, y):
+    '''The AOI of (x, y), testing every box, the button's first.'''
+    for code, (left, top, right, bottom) in boxes:
+        if left <= x < right and top <= y < bottom:
+            return code
+    return aoi.NONE
+
+
+def described_codes():
+    if not os.path.exists(AOI_DESCRIPTION):
+        return None
+    with open(AOI_DESCRIPTION) as file_:
+        lines = file_.read().split('\n')[1:]
+    return set(line.split(',')[0] for line in lines if line.strip())
+
+
+def make_samples(num_samples):
+    '''Gaze samples all over the screen, some off it, and one in
+    twenty lost, which the tracker reports as (0, 0).
+    '''
+    random = Random(0)
+    samples = []
+    for i in range(num_samples):
+        if i % 20 == 0:
+            samples.append((0.0, 0.0))
+        else:
+            samples.append((random.uniform(-100, WIDTH + 100),
+                            random.uniform(-100, HEIGHT + 100)))
+    return samples
+
+
+def best_of(repeats, function):
+    best = None
+    for _ in range(repeats):
+        start = time()
+        function()
+        elapsed = time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def bench_aoi(samples, reversed_, repeats=3):
+    aoi_map = aoi.feedback_aois(WIDTH, HEIGHT, MARGIN, NUM_PLAYERS,
+                                FEEDBACK_CFG, reversed_)
+    boxes = aoi_map.boxes()
+    codes = [aoi_map.code_at(x, y) for x, y in samples]
+    if codes != [scan(boxes, x, y) for x, y in samples]:
+        raise AssertionError('code_at() and the scan disagree.')
+    described = described_codes()
+    if described is not None and not set(codes) <= described:
+        raise AssertionError('Codes not in {}: {}'.format(
+                AOI_DESCRIPTION, sorted(set(codes) - described)
+                ))
+    scanned = best_of(repeats, lambda: [scan(boxes, x, y)
+                                        for x, y in samples])
+    single = best_of(repeats, lambda: [aoi_map.code_at(x, y)
+                                       for x, y in samples])
+    result = {'samples': len(samples),
+              'aois': len(boxes),
+              'scan_us_per_sample': scanned*1e6/len(samples),
+              'code_at_us_per_sample': single*1e6/len(samples)}
+    try:
+        import numpy
+    except ImportError:
+        return result
+    xs = numpy.array([x for x, _ in samples])
+    ys = numpy.array([y for _, y in samples])
+    if list(aoi_map.codes_at(xs, ys)) != codes:
+        raise AssertionError('codes_at() and code_at() disagree.')
+    batch = best_of(repeats, lambda: aoi_map.codes_at(xs, ys))
+    result['codes_at_us_per_sample'] = batch*1e6/len(samples)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', default=None,
+                        help='write the JSON results here')
+    parser.add_argument('--samples', type=int, default=100000,
+                        help='how many gaze samples to look up')
+    args = parser.parse_args()
+    samples = make_samples(args.samples)
+    results = {'contributions_left': bench_aoi(samples, False),
+               'contributions_right': bench_aoi(samples, True)}
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as file_:
+            file_.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
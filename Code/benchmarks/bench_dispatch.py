@@ -0,0 +1,93 @@
+'''
+CPU per message for the handler to answer the requests of a game,
+without the network in the way.
+
+Drives Player.message_command() in this process for a group of
+players with no sockets, so all that is measured is looking up,
+checking and carrying out the values asked for. Each round goes the
+way it does in the game: every player appends its contribution, then
+every player asks for all_set_up, then for IPs and IDs, and so on.
+Results are printed (or written with --output) as JSON:
+
+    python benchmarks/bench_dispatch.py --output bench_dispatch.json
+'''
+
+import argparse
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from handler import Player, Server
+from bench_tracker import cpu_time
+
+
+def round_messages(round_number):
+    def message(request, values):
+        return {u'category': u'handler', u'request': request,
+                u'values': values}
+    return [message(u'append', {u'contributions': round_number % 11}),
+            message(u'get', [u'all_set_up']),
+            message(u'get', [u'IPs', u'IDs']),
+            message(u'get', [u'all_contributions']),
+            message(u'get', [u'contributions']),
+            message(u'set', {u'is_set_up': True})]
+
+
+def bench_dispatch(num_players, num_rounds):
+    server = Server('localhost', 0)
+    try:
+        players = []
+        for i in range(num_players):
+            player = Player(None, ('10.0.0.{}'.format(i+1), None), server)
+            player.message_command({u'category': u'handler',
+                                    u'request': u'set',
+                                    u'values': {u'ID': u'player{}'.format(i),
+                                                u'num_players': num_players}})
+            players.append(player)
+        num_messages = 0
+        start = cpu_time()
+        for round_number in range(1, num_rounds+1):
+            messages = round_messages(round_number)
+            for message in messages:
+                for player in players:
+                    reply = player.message_command(message)
+                    if reply[u'statuscode'] != 200:
+                        raise AssertionError(reply)
+                num_messages += len(players)
+        cpu = cpu_time() - start
+    finally:
+        server.close()
+    return {'players': num_players,
+            'rounds': num_rounds,
+            'messages': num_messages,
+            'cpu_s': cpu,
+            'cpu_us_per_message': cpu*1e6/num_messages}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', default=None,
+                        help='write the JSON results here')
+    parser.add_argument('--players', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=10*10,
+                        help='rounds over all games (default 10 x 10)')
+    args = parser.parse_args()
+    # Prints from the handler go to stderr, to keep stdout JSON only.
+    stdout, sys.stdout = sys.stdout, sys.stderr
+    try:
+        results = bench_dispatch(args.players, args.rounds)
+    finally:
+        sys.stdout = stdout
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as file_:
+            file_.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+'''
+How screens keep up with the display: the old Screen.run() loop, which
+slept a frame after every flip, against frame_scheduler.FrameScheduler.
+
+Runs headless, with a fake window whose flip() blocks until the next
+vertical blank of a made-up 60 Hz display, as a real one does, and
+knows which blanks every flip made. The loops below do what
+Screen.run() does with an animated screen, an animated screen with
+some slow frames, and a static screen that changes now and then. The
+scheduler's flip times and dropped-frame counts are checked against
+the fake window's, and the cadence against the display's: a flip on
+every blank for an animated screen, give or take a few a second for
+the machine being busy, and one only when something changed for a
+static one. A wrong result raises an AssertionError. Results are
+printed (or written with --output) as JSON:
+
+    python benchmarks/bench_frame_scheduler.py
+'''
+
+import argparse
+import json
+import os
+import sys
+from time import sleep, time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from frame_scheduler import FrameScheduler
+
+FRAME_PERIOD = 1/60.0
+# What drawing a frame costs, and a slow one.
+DRAW_TIME = 0.002
+SLOW_DRAW_TIME = 1.5*FRAME_PERIOD
+
+
+class FakeWindow(object):
+
+    '''Stands in for a psychopy Window on a display with vertical
+    blanks every {monitorFramePeriod} seconds.
+    '''
+
+    def __init__(self, frame_period=FRAME_PERIOD):
+        self.monitorFramePeriod = frame_period
+        self.start = time()
+        self.blanks = []
+
+    def blank_after(self, when):
+        '''The number of the first vertical blank after {when}.'''
+        return int((when - self.start)/self.monitorFramePeriod) + 1
+
+    def flip(self):
+        blank = self.blank_after(time())
+        flip_time = self.start + blank*self.monitorFramePeriod
+        delay = flip_time - time()
+        if delay > 0:
+            sleep(delay)
+        self.blanks.append(blank)
+        return flip_time
+
+    def missed_blanks(self):
+        '''How many blanks went by without a flip, between flips.'''
+        return sum(later - earlier - 1
+                   for earlier, later in zip(self.blanks, self.blanks[1:]))
+
+
+def cpu_time():
+    times = os.times()
+    return times[0] + times[1]
+
+
+def frame_stats(window, num_passes, elapsed, cpu):
+    intervals = [(later - earlier)*window.monitorFramePeriod
+                 for earlier, later in zip(window.blanks, window.blanks[1:])]
+    return {'passes': num_passes,
+            'flips': len(window.blanks),
+            'flips_per_s': len(window.blanks)/elapsed,
+            'mean_frame_ms': sum(intervals)*1000/max(len(intervals), 1),
+            'missed_blanks': window.missed_blanks(),
+            'cpu_ms_per_s': cpu*1000/elapsed}
+
+
+def old_loop(num_passes):
+    '''Screen.run() as it was: draw, flip, then wait(0.016666).'''
+    window = FakeWindow()
+    start, start_cpu = time(), cpu_time()
+    for _ in range(num_passes):
+        sleep(DRAW_TIME)
+        window.flip()
+        sleep(0.016666)
+    return frame_stats(window, num_passes, time() - start,
+                       cpu_time() - start_cpu)
+
+
+def scheduled_loop(num_passes, draw_time=None, dirty=None):
+    '''Screen.run() now. {draw_time}(i) is how long drawing frame i
+    takes; {dirty}(i) whether a static screen changed on pass i, or
+    None for an animated screen.
+    '''
+    window = FakeWindow()
+    frames = FrameScheduler(window)
+    start, start_cpu = time(), cpu_time()
+    for i in range(num_passes):
+        if dirty is None or i == 0 or dirty(i):
+            sleep(DRAW_TIME if draw_time is None else draw_time(i))
+            frames.flip()
+        else:
+            frames.idle()
+    result = frame_stats(window, num_passes, time() - start,
+                         cpu_time() - start_cpu)
+    expected_times = [window.start + blank*window.monitorFramePeriod
+                      for blank in window.blanks]
+    if frames.flip_times != expected_times:
+        raise AssertionError('Flip times recorded wrong.')
+    result['dropped'] = frames.dropped
+    result['onset_ms_after_start'] = (frames.onset - window.start)*1000
+    return result
+
+
+def check_dropped(result, expected):
+    if result['dropped'] != expected:
+        raise AssertionError('Counted {} dropped frames, not {}.'.format(
+                result['dropped'], expected
+                ))
+
+
+def check_cadence(result, min_missed, max_missed, flips=None):
+    if not min_missed <= result['missed_blanks'] <= max_missed:
+        raise AssertionError('Missed {} blanks, not {} to {}.'.format(
+                result['missed_blanks'], min_missed, max_missed
+                ))
+    if flips is not None and result['flips'] != flips:
+        raise AssertionError('Flipped {} times, not {}.'.format(
+                result['flips'], flips
+                ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', default=None,
+                        help='write the JSON results here')
+    parser.add_argument('--passes', type=int, default=180,
+                        help='passes of the screen loop per run')
+    args = parser.parse_args()
+    passes = args.passes
+    # Sleeps can overrun on a busy machine, so allow a few missed
+    # blanks a second; the old loop missed one every pass.
+    jitter = passes//20
+    animated = scheduled_loop(passes)
+    check_dropped(animated, animated['missed_blanks'])
+    check_cadence(animated, 0, jitter, flips=passes)
+    # Every 10th frame takes a frame and a half to draw, so misses
+    # one blank.
+    slow = scheduled_loop(
+            passes,
+            draw_time=lambda i: SLOW_DRAW_TIME if i % 10 == 5 else DRAW_TIME
+            )
+    check_dropped(slow, slow['missed_blanks'])
+    num_slow = len([i for i in range(passes) if i % 10 == 5])
+    check_cadence(slow, num_slow, num_slow + jitter, flips=passes)
+    # Changes twice a second; idle() passes between flips are not
+    # dropped frames.
+    static = scheduled_loop(passes, dirty=lambda i: i % 30 == 0)
+    check_dropped(static, 0)
+    check_cadence(static, 0, passes,
+                  flips=len([i for i in range(passes) if i % 30 == 0]))
+    results = {'old_loop': old_loop(passes),
+               'animated': animated,
+               'animated_slow_frames': slow,
+               'static': static}
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as file_:
+            file_.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+'''
+Time to turn a pushed frame message into a FrameSnapshot, the old way
+and with frames.FrameDecoder.
+
+The old way is what MessageProcessor used to do with every frame:
+replace -1.#IND, json.loads() the whole message and pick the fields
+out of the dicts. The frames are read from a *_ET.txt file recorded
+with TextFrameRecorder (--replay), or made up, with one in ten lost
+the way the eye tribe server writes it: state 0 and -1.#IND for the
+pupil centres. Results are printed (or written with --output) as
+JSON:
+
+    python benchmarks/bench_frames.py --replay 1_game_1_ET.txt
+'''
+
+import argparse
+import json
+import os
+import sys
+from random import Random
+from time import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from frames import FrameDecoder, FrameSnapshot
+from tracker_simulator import load_recorded_frames, make_frame
+
+
+def made_up_frames(num_frames):
+    random = Random(0)
+    frames = []
+    for i in range(num_frames):
+        frame = make_frame(1400000000000 + i*16,
+                           random.uniform(0, 1920), random.uniform(0, 1080))
+        if i % 10 == 0:
+            frame[u'state'] = 0
+            for eye in (u'lefteye', u'righteye'):
+                frame[eye][u'pcenter'] = {u'x': float('nan'),
+                                          u'y': float('nan')}
+        frames.append(frame)
+    return frames
+
+
+def to_messages(frames):
+    '''The frames as the server sends them: compact JSON, with NaN
+    written as -1.#IND.
+    '''
+    messages = []
+    for frame in frames:
+        frame = dict(frame)
+        # Added by EyeTribeServer, not sent by the server.
+        frame.pop(u'host_time', None)
+        msg = {u'category': u'tracker', u'request': u'get',
+               u'statuscode': 200, u'values': {u'frame': frame}}
+        messages.append(json.dumps(msg, separators=(',', ':'))
+                        .replace('NaN', '-1.#IND'))
+    return messages
+
+
+def old_way(raw_msg):
+    msg = json.loads(raw_msg.replace('-1.#IND', '0.0'))
+    return FrameSnapshot.from_frame(msg[u'values'][u'frame'])
+
+
+def new_way(decoder, raw_msg):
+    return FrameSnapshot.from_values(decoder.decode(raw_msg), raw=raw_msg)
+
+
+def fields(snapshot):
+    return (snapshot.time, snapshot.state, snapshot.fix, snapshot.avg_xy,
+            snapshot.left_pcenter, snapshot.right_pcenter)
+
+
+def best_of(repeats, function, messages):
+    best = None
+    for _ in range(repeats):
+        start = time()
+        for raw_msg in messages:
+            function(raw_msg)
+        elapsed = time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def bench_frames(messages, repeats=3):
+    decoder = FrameDecoder()
+    for raw_msg in messages:
+        if fields(old_way(raw_msg)) != fields(new_way(decoder, raw_msg)):
+            raise AssertionError('Decoded differently: {}'.format(raw_msg))
+    old = best_of(repeats, old_way, messages)
+    new = best_of(repeats, lambda raw_msg: new_way(decoder, raw_msg),
+                  messages)
+    return {'frames': len(messages),
+            'old_us_per_frame': old*1e6/len(messages),
+            'decoder_us_per_frame': new*1e6/len(messages),
+            'speedup': old/new}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', default=None,
+                        help='write the JSON results here')
+    parser.add_argument('--replay', default=None,
+                        help='a *_ET.txt file of recorded frames')
+    parser.add_argument('--frames', type=int, default=20000,
+                        help='how many frames to make up without --replay')
+    args = parser.parse_args()
+    if args.replay is None:
+        frames = made_up_frames(args.frames)
+    else:
+        frames = load_recorded_frames(args.replay)
+    results = bench_frames(to_messages(frames))
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as file_:
+            file_.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+'''
+Correctness and throughput of framing.LineBuffer.
+
+Streams of handler messages, from small get replies up to an
+all_contributions reply for 128 players over 300 rounds, are cut into
+random chunks and reassembled, both straight through feed() and over a
+real socket pair with recv_from(), and once more with a two-byte
+delimiter. Every message has to come out exactly as it went in. The
+same streams split naively, one recv at a time, show how many
+messages that would have corrupted.
+
+Then a socket server pushes frames to a pytribe.EyeTribeServer, cut
+into random chunks the same way, and every frame has to come out of
+iter_frames() as it went in, in order. A message or frame that
+does not raises an AssertionError, so the script exits non-zero.
+Results are printed (or written with --output) as JSON:
+
+    python benchmarks/bench_framing.py --output bench_framing.json
+'''
+
+import argparse
+import json
+import os
+import random
+import socket
+import sys
+import threading
+from time import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import pytribe
+from bench_tracker import stop_server
+from framing import LineBuffer, decode, encode
+from tracker_simulator import make_frame
+
+# The time of the frames sent until the client is ready for the real
+# ones.
+WARM_UP_TIME = 0
+
+
+def make_messages(num_messages, num_players, num_rounds):
+    '''Mostly small replies, with a large one every 100 messages.'''
+    contributions = dict(
+            ('10.0.0.{}'.format(i), [i % 11]*num_rounds)
+            for i in range(num_players)
+            )
+    messages = []
+    for i in range(num_messages):
+        if i % 100 == 99:
+            values = {u'all_contributions': contributions}
+        else:
+            values = {u'ID': u'player{}'.format(i)}
+        messages.append({u'category': u'handler', u'request': u'get',
+                         u'statuscode': 200, u'id': i, u'values': values})
+    return messages
+
+
+def random_chunks(data, rng, max_chunk):
+    chunks = []
+    position = 0
+    while position < len(data):
+        size = rng.randint(1, max_chunk)
+        chunks.append(data[position:position+size])
+        position += size
+    return chunks
+
+
+def check(received, messages):
+    if received != messages:
+        raise AssertionError('LineBuffer corrupted the stream.')
+
+
+def bench_feed(messages, max_chunk, seed):
+    '''Reassemble randomly chunked data with feed().'''
+    data = ''.join(encode(message) for message in messages)
+    chunks = random_chunks(data, random.Random(seed), max_chunk)
+    line_buffer = LineBuffer()
+    received = []
+    start = time()
+    for chunk in chunks:
+        for line in line_buffer.feed(chunk):
+            received.append(decode(line))
+    elapsed = time() - start
+    check(received, messages)
+    naive_corrupt = 0
+    for chunk in chunks:
+        for piece in chunk.split('\n'):
+            if piece == '':
+                continue
+            try:
+                json.loads(piece)
+            except ValueError:
+                naive_corrupt += 1
+    return {'messages': len(messages),
+            'chunks': len(chunks),
+            'max_chunk': max_chunk,
+            'messages_per_s': len(messages)/elapsed,
+            'mb_per_s': len(data)/elapsed/1e6,
+            'naive_split_corrupt_pieces': naive_corrupt}
+
+
+def check_delimiter(messages, delimiter, seed):
+    '''Reassemble randomly chunked data, down to single bytes, with a
+    delimiter of more than one byte, which chunks often split.
+    '''
+    data = ''.join(json.dumps(message) + delimiter for message in messages)
+    chunks = random_chunks(data, random.Random(seed), 3)
+    line_buffer = LineBuffer(delimiter=delimiter)
+    received = []
+    for chunk in chunks:
+        for line in line_buffer.feed(chunk):
+            received.append(decode(line))
+    check(received, messages)
+    return {'messages': len(messages), 'delimiter': repr(delimiter)}
+
+
+def bench_socket(messages, max_chunk, seed):
+    '''Reassemble data sent in random chunks over a socket pair with
+    recv_from().
+    '''
+    data = ''.join(encode(message) for message in messages)
+    chunks = random_chunks(data, random.Random(seed), max_chunk)
+    sender, receiver = socket.socketpair()
+
+    def send_all():
+        for chunk in chunks:
+            sender.sendall(chunk)
+        sender.shutdown(socket.SHUT_WR)
+
+    thread = threading.Thread(target=send_all)
+    line_buffer = LineBuffer()
+    received = []
+    start = time()
+    thread.start()
+    while True:
+        lines = line_buffer.recv_from(receiver)
+        if lines is None:
+            break
+        for line in lines:
+            received.append(decode(line))
+    elapsed = time() - start
+    thread.join()
+    sender.close()
+    receiver.close()
+    check(received, messages)
+    return {'messages': len(messages),
+            'messages_per_s': len(messages)/elapsed,
+            'mb_per_s': len(data)/elapsed/1e6}
+
+
+def make_frame_messages(num_frames):
+    '''Frame messages as the eye tribe server pushes them.'''
+    start = 1400000000000
+    return [{u'category': u'tracker', u'request': u'get',
+             u'statuscode': 200,
+             u'values': {u'frame': make_frame(start + i*16,
+                                              100.0 + i*0.5, 200.25)}}
+            for i in range(num_frames)]
+
+
+def bench_tracker_stream(frames, max_chunk, seed):
+    '''Push {frames} to a pytribe.EyeTribeServer from a socket server
+    that cuts the stream into random chunks of up to {max_chunk} bytes,
+    sending each one on its own, and check that iter_frames() yields
+    every frame intact and in order.
+    '''
+    data = ''.join(json.dumps(frame) + '\n' for frame in frames)
+    chunks = random_chunks(data, random.Random(seed), max_chunk)
+    warm_up = json.dumps({u'category': u'tracker', u'request': u'get',
+                          u'statuscode': 200,
+                          u'values': {u'frame': make_frame(WARM_UP_TIME,
+                                                           0.0, 0.0)}})
+    listener = socket.socket()
+    listener.bind(('localhost', 0))
+    listener.listen(1)
+    ready = threading.Event()
+
+    def serve():
+        conn, _ = listener.accept()
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # iter_frames() only starts queueing frames once it is asked
+        # for the first, so send throwaway ones until then.
+        while not ready.is_set():
+            conn.sendall(warm_up + '\n')
+            ready.wait(0.01)
+        for chunk in chunks:
+            conn.sendall(chunk)
+        # Read the heartbeats until the client is done. Closing with
+        # them unread would reset the connection, and the frames not
+        # yet read at the other end would be lost.
+        while conn.recv(4096):
+            pass
+        conn.close()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    server = pytribe.EyeTribeServer(port=listener.getsockname()[1])
+    received = []
+    start = None
+    iterator = server.iter_frames(timeout=10.0, max_buffered=len(frames))
+    for frame in iterator:
+        ready.set()
+        if frame[u'time'] == WARM_UP_TIME:
+            continue
+        if start is None:
+            start = time()
+        del frame[u'host_time']
+        received.append(frame)
+        if len(received) == len(frames):
+            break
+    elapsed = time() - start
+    iterator.close()
+    stop_server(server)
+    thread.join()
+    listener.close()
+    if received != [message[u'values'][u'frame'] for message in frames]:
+        raise AssertionError('EyeTribeServer corrupted the frames.')
+    return {'frames': len(frames),
+            'chunks': len(chunks),
+            'max_chunk': max_chunk,
+            'frames_per_s': len(frames)/elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', default=None,
+                        help='write the JSON results here')
+    parser.add_argument('--quick', action='store_true',
+                        help='fewer samples, for a smoke test')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    num_messages = 2000 if args.quick else 20000
+    seeds = range(args.seed, args.seed + (3 if args.quick else 20))
+    messages = make_messages(num_messages, 128, 300)
+    small = [message for message in messages
+             if u'ID' in message[u'values']]
+    results = {}
+    for max_chunk in (1, 16, 4096, 65536):
+        if max_chunk == 1:
+            # One byte at a time is slow, and only about correctness.
+            sample = messages[:200]
+        else:
+            sample = messages
+        for seed in seeds:
+            result = bench_feed(sample, max_chunk, seed)
+        results['feed_max_chunk_{}'.format(max_chunk)] = result
+    results['feed_small_only'] = bench_feed(small, 4096, args.seed)
+    for seed in seeds:
+        results['socketpair'] = bench_socket(messages, 8192, seed)
+    for seed in seeds:
+        results['crlf_delimiter'] = check_delimiter(small[:500], b'\r\n',
+                                                    seed)
+    frames = make_frame_messages(300 if args.quick else 3000)
+    for max_chunk in (1, 7, 4096):
+        if max_chunk == 1:
+            sample = frames[:100]
+        else:
+            sample = frames
+        for seed in seeds[:3]:
+            result = bench_tracker_stream(sample, max_chunk, seed)
+        results['tracker_max_chunk_{}'.format(max_chunk)] = result
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as file_:
+            file_.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+'''
+Load test for the handler.py session server.
+
+For 2, 16 and 128 players, starts handler.py in a separate process,
+connects that many handler_communication.ClientThread peers on
+localhost and has all of them call get_value() as fast as the replies
+come back. Every reply has to be the peer's own ID, so a reply that
+was cut short, glued to another or sent to the wrong peer raises an
+AssertionError. Reports the round trip latency and the messages per
+second the server answered, as JSON:
+
+    python benchmarks/bench_handler.py --output bench_handler.json
+'''
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+from time import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from handler_communication import ClientThread
+from bench_tracker import summarize_ms
+
+
+class Handler(object):
+
+    '''Runs handler.py in a child process.'''
+
+    def __init__(self, args=(), port=None):
+        if port is None:
+            probe = socket.socket()
+            probe.bind(('localhost', 0))
+            port = probe.getsockname()[1]
+            probe.close()
+        self.port = port
+        self.process = subprocess.Popen(
+                [sys.executable, '-u',
+                 os.path.join(os.path.dirname(HERE), 'handler.py'),
+                 '--host', 'localhost', '--port', str(self.port)] +
+                list(args),
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE
+                )
+        # Wait until it is listening.
+        self.process.stdout.readline()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # Like pressing Enter in its console, which closes the journal
+        # before exiting.
+        self.process.stdin.close()
+        self.process.wait()
+
+
+def connect_peers(port, num_players):
+    '''Connect the peers one at a time, the way the stations do: the
+    handler only lets in the rest once the first has said how many
+    players there are.
+    '''
+    peers = []
+    for i in range(num_players):
+        peer = ClientThread('localhost', port, 'player{}'.format(i),
+                            num_players)
+        peer.daemon = True
+        peer.start()
+        # Requests are answered in order, so once this is answered the
+        # handler knows num_players and lets in the next peer.
+        peer.get_value(u'num_players')
+        peers.append(peer)
+    return peers
+
+
+def run_peer(peer, ID, num_requests, round_trips, errors):
+    mine = []
+    try:
+        for _ in range(num_requests):
+            start = time()
+            reply = peer.get_value(u'ID')
+            mine.append(time() - start)
+            if reply != ID:
+                raise AssertionError('{} got the reply for {}.'.format(
+                        ID, reply
+                        ))
+    except Exception as error_:
+        errors.append(error_)
+    round_trips.extend(mine)
+
+
+def bench_players(num_players, num_requests):
+    '''Every peer sends {num_requests} gets one after the other, all
+    peers at once.
+    '''
+    round_trips = []
+    errors = []
+    with Handler() as handler:
+        peers = connect_peers(handler.port, num_players)
+        threads = [threading.Thread(target=run_peer,
+                                    args=(peer, 'player{}'.format(i),
+                                          num_requests, round_trips, errors))
+                   for i, peer in enumerate(peers)]
+        start = time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time() - start
+        for peer in peers:
+            peer.stop()
+    if errors:
+        raise errors[0]
+    result = summarize_ms(round_trips)
+    result['players'] = num_players
+    result['messages_per_s'] = len(round_trips)/elapsed
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', default=None,
+                        help='write the JSON results here')
+    parser.add_argument('--quick', action='store_true',
+                        help='fewer samples, for a smoke test')
+    args = parser.parse_args()
+    total_requests = 2000 if args.quick else 20000
+    results = {}
+    for num_players in (2, 16, 128):
+        results['players_{}'.format(num_players)] = bench_players(
+                num_players, max(total_requests//num_players, 10)
+                )
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as file_:
+            file_.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+'''
+Time to find the contribution choice under the mouse: the old scan of
+every choice against hit_test.GridIndex, for the 3 x 7 grid of 0-20
+and bigger ones.
+
+The choices are laid out as ContribScreen.gen_contrib_choices() lays
+them out on a 1920 x 1080 window, in psychopy's centred coordinates,
+and both ways are checked to find the same choice for every point.
+Results are printed (or written with --output) as JSON:
+
+    python benchmarks/bench_hit_test.py
+'''
+
+import argparse
+import json
+import os
+import sys
+from math import floor, sqrt
+from random import Random
+from time import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from hit_test import GridIndex, SpatialHash
+
+WIDTH, HEIGHT, MARGIN = 1920, 1080, 100
+
+
+def xydist(p1, p2):
+    # As psychopy.event.xydist
+    return sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
+
+
+def layout(nrows, ncols):
+    '''The centres of the choices, the grid of them and the mouseover
+    threshold, as ContribScreen has them.
+    '''
+    h_spacing = (WIDTH - 2*MARGIN)/(ncols-1)
+    v_spacing = h_spacing
+    centres = []
+    for i in range(nrows*ncols):
+        xpos = MARGIN + (i % ncols)*h_spacing
+        ypos = floor(1.0*i/ncols)*v_spacing + MARGIN
+        centres.append((xpos - WIDTH/2, -(ypos - HEIGHT/2)))
+    grid = GridIndex(centres[0], (h_spacing, -v_spacing), nrows, ncols)
+    return centres, grid, min(h_spacing, v_spacing)/4
+
+
+def scan(centres, pos, threshold):
+    for index, centre in enumerate(centres):
+        if xydist(pos, centre) < threshold:
+            return index
+    return None
+
+
+def best_of(repeats, function, points):
+    best = None
+    for _ in range(repeats):
+        start = time()
+        for pos in points:
+            function(pos)
+        elapsed = time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def bench_grid(nrows, ncols, points, repeats=3):
+    centres, grid, threshold = layout(nrows, ncols)
+    hash_ = SpatialHash(bucket_size=threshold*2)
+    for index, (x, y) in enumerate(centres):
+        hash_.add(index, (x - threshold, y - threshold,
+                          x + threshold, y + threshold),
+                  contains=lambda pos, centre=(x, y):
+                          xydist(pos, centre) < threshold)
+    # Half of the points near a choice, as the mouse mostly is.
+    random = Random(1)
+    points = points + [(x + random.uniform(-threshold*1.5, threshold*1.5),
+                        y + random.uniform(-threshold*1.5, threshold*1.5))
+                       for x, y in (random.choice(centres) for _ in points)]
+    for pos in points:
+        expected = scan(centres, pos, threshold)
+        if grid.hit(pos, threshold) != expected or hash_.hit(pos) != expected:
+            raise AssertionError('Found different choices at {}'.format(pos))
+    old = best_of(repeats, lambda pos: scan(centres, pos, threshold), points)
+    new = best_of(repeats, lambda pos: grid.hit(pos, threshold), points)
+    hashed = best_of(repeats, hash_.hit, points)
+    return {'choices': nrows*ncols,
+            'scan_us_per_lookup': old*1e6/len(points),
+            'grid_us_per_lookup': new*1e6/len(points),
+            'spatial_hash_us_per_lookup': hashed*1e6/len(points),
+            'speedup': old/new}
+
+
+def make_points(num_points):
+    random = Random(0)
+    return [(random.uniform(-WIDTH/2, WIDTH/2),
+             random.uniform(-HEIGHT/2, HEIGHT/2))
+            for _ in range(num_points)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', default=None,
+                        help='write the JSON results here')
+    parser.add_argument('--points', type=int, default=20000,
+                        help='how many mouse positions to look up')
+    args = parser.parse_args()
+    points = make_points(args.points)
+    results = {'0_to_20': bench_grid(3, 7, points),
+               '0_to_100': bench_grid(6, 17, points)}
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as file_:
+            file_.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+'''
+What journaling the handler's session state costs per round trip.
+
+Runs handler.py with and without --journal and times set and append
+requests from one ClientThread, each answered before the next is
+sent, so every one of them is written to the journal before its
+reply.
+
+It also kills a handler part way through a session, leaves half an
+entry at the end of its journal, as a crash in the middle of a write
+would, and restarts it on the same journal. The group has to be back
+as it was for the reconnected player, and the journal readable from
+end to end after more writes. A wrong result raises an
+AssertionError. Results are printed (or written with --output) as
+JSON:
+
+    python benchmarks/bench_journal.py --output bench_journal.json
+
+The journal goes next to this file by default, so it is fsynced to a
+real disk; --directory puts it elsewhere.
+'''
+
+import argparse
+import json
+import os
+import sys
+from time import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from handler_communication import ClientThread
+from bench_handler import Handler
+from bench_tracker import summarize_ms
+from journal import read_journal
+
+# Half of an entry, as a crash in the middle of write() leaves it.
+TORN_ENTRY = b'{"op": "append", "IP": "127.0.0.1", "val'
+
+
+def bench_round_trips(num_requests, journal_file=None):
+    args = []
+    if journal_file is not None:
+        args = ['--journal', journal_file]
+    round_trips = []
+    with Handler(args) as handler:
+        peer = ClientThread('localhost', handler.port, 'player', 1)
+        peer.daemon = True
+        peer.start()
+        peer.get_value(u'num_players')
+        for i in range(num_requests):
+            if i % 2:
+                request, values = u'append', {u'contributions': i % 11}
+            else:
+                request, values = u'set', {u'is_set_up': bool(i % 4)}
+            start = time()
+            peer.send_message(request, values, expect_reply=True).wait(
+                    peer.reply_timeout
+                    )
+            round_trips.append(time() - start)
+        peer.stop()
+    return summarize_ms(round_trips)
+
+
+def check_crash_replay(journal_file, num_appends):
+    '''Kill the handler after {num_appends} contributions, tear the
+    journal's last entry and check that a restarted handler has them
+    all back when the player reconnects.
+    '''
+    contributions = [i % 11 for i in range(num_appends)]
+    handler = Handler(['--journal', journal_file])
+    peer = ClientThread('localhost', handler.port, 'player', 1)
+    peer.daemon = True
+    peer.start()
+    try:
+        peer.get_value(u'num_players')
+        for contribution in contributions:
+            peer.send_message(
+                    u'append', {u'contributions': contribution},
+                    expect_reply=True
+                    ).wait(peer.reply_timeout)
+        handler.process.kill()
+        handler.process.wait()
+        with open(journal_file, 'ab') as file_:
+            file_.write(TORN_ENTRY)
+        start = time()
+        # On the same port; the peer reconnects by itself.
+        with Handler(['--journal', journal_file], port=handler.port):
+            restored = peer.get_value(u'all_contributions')
+            recovered_after = time() - start
+            if restored.values() != [contributions]:
+                raise AssertionError(
+                        'Replayed {} contributions, not {}.'.format(
+                                restored.values(), [contributions]
+                                ))
+            peer.send_message(u'append', {u'contributions': 0},
+                              expect_reply=True).wait(peer.reply_timeout)
+            peer.stop()
+    finally:
+        peer.stop()
+        if handler.process.poll() is None:
+            handler.__exit__(None, None, None)
+    # Raises a ValueError if the torn entry was left in the middle.
+    entries = read_journal(journal_file)
+    return {'contributions': num_appends,
+            'entries': len(entries),
+            'recovered_after_ms': recovered_after*1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', default=None,
+                        help='write the JSON results here')
+    parser.add_argument('--quick', action='store_true',
+                        help='fewer samples, for a smoke test')
+    parser.add_argument('--directory', default=HERE,
+                        help='where to put the journal')
+    args = parser.parse_args()
+    num_requests = 1000 if args.quick else 10000
+    journal_file = os.path.join(args.directory, 'bench_journal.txt')
+    if os.path.exists(journal_file):
+        os.remove(journal_file)
+    results = {'no_journal': bench_round_trips(num_requests)}
+    results['journal'] = bench_round_trips(num_requests, journal_file)
+    results['journal']['bytes'] = os.path.getsize(journal_file)
+    os.remove(journal_file)
+    results['crash_replay'] = check_crash_replay(journal_file, 20)
+    os.remove(journal_file)
+    for stat in ('p50_ms', 'p99_ms'):
+        results['overhead_' + stat] = (results['journal'][stat] -
+                                       results['no_journal'][stat])
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as file_:
+            file_.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+'''
+Bytes on the wire and handler CPU for keeping every station's view of
+all_contributions up to date, over a 10 game x 10 round x 8 player
+session.
+
+After every round, each station fetches the contributions once,
+either the old way with get_value(u'all_contributions'), which sends
+every player's whole history, or with get_all_contributions(), which
+only sends what is new since its last call. The bytes counted are
+everything the stations receive, including the replies to their
+appends and the round_complete pushes, which are the same either way.
+Results are printed (or written with --output) as JSON:
+
+    python benchmarks/bench_session_state.py --output bench_session.json
+
+The handler CPU is read from /proc, so it is only reported on Linux.
+'''
+
+import argparse
+import json
+import os
+import sys
+import threading
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from framing import LineBuffer
+from handler_communication import ClientThread
+from bench_handler import Handler
+
+
+def process_cpu(pid):
+    '''CPU seconds used by a process so far, or None.'''
+    try:
+        with open('/proc/{}/stat'.format(pid)) as stat:
+            fields = stat.read().rsplit(')', 1)[1].split()
+    except IOError:
+        return None
+    # utime and stime, fields 14 and 15 of the full line
+    return (int(fields[11]) + int(fields[12]))/float(os.sysconf('SC_CLK_TCK'))
+
+
+class CountingLineBuffer(LineBuffer):
+
+    '''A LineBuffer that counts the bytes it receives.'''
+
+    def __init__(self, *args, **kwargs):
+        super(CountingLineBuffer, self).__init__(*args, **kwargs)
+        self.bytes_received = 0
+
+    def feed(self, data):
+        self.bytes_received += len(data)
+        return super(CountingLineBuffer, self).feed(data)
+
+
+def connect_stations(port, num_players):
+    '''Connect each peer from an address of its own, like the real
+    stations, so all_contributions has one entry per player.
+    '''
+    peers = []
+    for i in range(num_players):
+        peer = ClientThread('localhost', port, 'player{}'.format(i),
+                            num_players,
+                            source_address=('127.0.0.{}'.format(i+2), 0))
+        peer.line_buffer = CountingLineBuffer()
+        peer.daemon = True
+        peer.start()
+        peer.get_value(u'num_players')
+        peers.append(peer)
+    return peers
+
+
+def play_round(peers, round_number, fetch):
+    '''Every peer contributes, waits for the round to be complete and
+    fetches the contributions.
+    '''
+    def station(peer):
+        peer.send_contrib(round_number % 11)
+        peer.round_complete(round_number).wait(peer.reply_timeout)
+        fetch(peer)
+
+    threads = [threading.Thread(target=station, args=(peer,))
+               for peer in peers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def bench_session(num_players, num_rounds, incremental):
+    if incremental:
+        fetch = lambda peer: peer.get_all_contributions()
+    else:
+        fetch = lambda peer: peer.get_value(u'all_contributions')
+    with Handler() as handler:
+        peers = connect_stations(handler.port, num_players)
+        start_bytes = sum(peer.line_buffer.bytes_received for peer in peers)
+        start_cpu = process_cpu(handler.process.pid)
+        for round_number in range(1, num_rounds+1):
+            play_round(peers, round_number, fetch)
+        end_cpu = process_cpu(handler.process.pid)
+        total_bytes = sum(peer.line_buffer.bytes_received
+                          for peer in peers) - start_bytes
+        if incremental:
+            # The copy kept by the stations must match the real thing.
+            expected = peers[0].get_value(u'all_contributions')
+            if peers[0].get_all_contributions() != expected:
+                raise AssertionError('get_all_contributions() is wrong.')
+        for peer in peers:
+            # The first to quit ends the group, which stops the rest.
+            peer.stop()
+    result = {'players': num_players,
+              'rounds': num_rounds,
+              'bytes_received': total_bytes,
+              'bytes_per_station_round':
+                      total_bytes*1.0/(num_players*num_rounds)}
+    if start_cpu is not None:
+        result['handler_cpu_s'] = end_cpu - start_cpu
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', default=None,
+                        help='write the JSON results here')
+    parser.add_argument('--players', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=10*10,
+                        help='rounds over all games (default 10 x 10)')
+    args = parser.parse_args()
+    results = {}
+    for name, incremental in (('full_history', False),
+                              ('since_version', True)):
+        results[name] = bench_session(args.players, args.rounds, incremental)
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as file_:
+            file_.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
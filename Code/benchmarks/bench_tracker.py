@@ -0,0 +1,361 @@
+'''
+Latency and throughput benchmarks for pytribe.EyeTribeServer.
+
+Every benchmark runs the client against tracker_simulator.py in a
+separate process, so the CPU figures are the client's alone. Results
+are printed (or written with --output) as JSON, e.g.
+
+    python benchmarks/bench_tracker.py --output bench_tracker.json
+
+so runs can be compared numerically.
+'''
+
+import argparse
+import errno
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+from time import sleep, time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import pytribe
+import recorders
+from framing import LineBuffer
+from tracker_simulator import make_frame
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = int(round(pct/100.0*(len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize_ms(seconds):
+    return {'n': len(seconds),
+            'p50_ms': percentile(seconds, 50)*1000,
+            'p99_ms': percentile(seconds, 99)*1000,
+            'max_ms': max(seconds)*1000}
+
+
+def cpu_time():
+    times = os.times()
+    return times[0] + times[1]
+
+
+class Simulator(object):
+
+    '''Runs tracker_simulator.py in a child process.'''
+
+    def __init__(self, framerate=60, speed=1.0):
+        probe = socket.socket()
+        probe.bind(('localhost', 0))
+        self.port = probe.getsockname()[1]
+        probe.close()
+        self.process = subprocess.Popen(
+                [sys.executable, '-u',
+                 os.path.join(os.path.dirname(HERE), 'tracker_simulator.py'),
+                 '--port', str(self.port),
+                 '--framerate', str(framerate),
+                 '--speed', str(speed)],
+                stdout=subprocess.PIPE
+                )
+        # Wait until it is listening.
+        self.process.stdout.readline()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait()
+
+
+def stop_server(server):
+    for thread in (server.heart_thr, server.processor_thr,
+                   server.listener_thr, server.state_dispatcher):
+        thread.stop()
+    # Wake up the threads blocked on the Queue and the socket.
+    server.raw_q.put('{"category": "heartbeat", "statuscode": 200}')
+    server.socket.shutdown(socket.SHUT_RDWR)
+    server.socket.close()
+
+
+def bench_ingest(duration, speed):
+    '''How many pushed frames per second the client keeps up with,
+    and how much CPU it spends per 1000 of them.
+    '''
+    with Simulator(speed=speed) as sim:
+        server = pytribe.EyeTribeServer(port=sim.port)
+        server.push = True
+        sleep(0.5)
+        start_frames = server.frame_number
+        start_cpu = cpu_time()
+        start = time()
+        sleep(duration)
+        frames = server.frame_number - start_frames
+        elapsed = time() - start
+        cpu = cpu_time() - start_cpu
+        server.push = False
+        stop_server(server)
+    return {'offered_hz': 60*speed,
+            'frames': frames,
+            'frames_per_s': frames/elapsed,
+            'cpu_ms_per_1000_frames': 1000*cpu*1000.0/max(frames, 1)}
+
+
+def bench_frame_latency(num_frames):
+    '''Time from the tracker stamping a frame to it being visible
+    through EyeTribeServer.frame, in push mode.
+    '''
+    latencies = []
+    with Simulator() as sim:
+        server = pytribe.EyeTribeServer(port=sim.port)
+        server.push = True
+        frame_number = server.frame_number
+        while len(latencies) < num_frames:
+            frame_number, frame = server.wait_for_frame(frame_number)
+            latencies.append(time() - frame[u'time']/1000.0)
+        server.push = False
+        stop_server(server)
+    # The frame time only has millisecond resolution.
+    return summarize_ms([max(latency, 0.0) for latency in latencies])
+
+
+def bench_pull_frame(num_frames):
+    '''Round trip of a pull-mode EyeTribeServer.frame, with the CPU
+    it costs.
+    '''
+    round_trips = []
+    with Simulator() as sim:
+        server = pytribe.EyeTribeServer(port=sim.port)
+        start_cpu = cpu_time()
+        for _ in range(num_frames):
+            start = time()
+            server.frame
+            round_trips.append(time() - start)
+        cpu = cpu_time() - start_cpu
+        stop_server(server)
+    result = summarize_ms(round_trips)
+    result['cpu_ms_per_frame'] = cpu*1000.0/num_frames
+    return result
+
+
+def bench_get_round_trip(num_threads, num_gets):
+    '''Round trip of property reads from several threads at once.'''
+    round_trips = []
+    lock = threading.Lock()
+    with Simulator() as sim:
+        server = pytribe.EyeTribeServer(port=sim.port)
+
+        def reader(name):
+            mine = []
+            for _ in range(num_gets):
+                start = time()
+                getattr(server, name)
+                mine.append(time() - start)
+            with lock:
+                round_trips.extend(mine)
+
+        names = ['framerate', 'screenres', 'iscalibrated', 'trackerstate']
+        threads = [threading.Thread(target=reader, args=(names[i % 4],))
+                   for i in range(num_threads)]
+        start = time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time() - start
+        stop_server(server)
+    result = summarize_ms(round_trips)
+    result['threads'] = num_threads
+    result['gets_per_s'] = len(round_trips)/elapsed
+    return result
+
+
+def bench_state_storm(num_notifications):
+    '''How long a burst of tracker state changes, e.g. a tracker
+    flapping between states, takes to reach a subscriber, how many
+    threads that takes and whether they arrive in order.
+    '''
+    received = []
+    peak_threads = [threading.active_count()]
+    all_received = threading.Event()
+
+    def subscriber(msg):
+        received.append(msg[u'values'][u'seq'])
+        peak_threads[0] = max(peak_threads[0], threading.active_count())
+        if len(received) == num_notifications:
+            all_received.set()
+
+    with Simulator() as sim:
+        server = pytribe.EyeTribeServer(port=sim.port)
+        server.subscribe(u'tracker', subscriber)
+        threads_before = threading.active_count()
+        start = time()
+        for i in range(num_notifications):
+            # As the listener thread would hand them over.
+            server.raw_q.put(json.dumps({u'category': u'tracker',
+                                         u'statuscode': 802,
+                                         u'values': {u'seq': i}}))
+        all_received.wait()
+        elapsed = time() - start
+        stop_server(server)
+    return {'notifications': num_notifications,
+            'notifications_per_s': num_notifications/elapsed,
+            'extra_threads': peak_threads[0] - threads_before,
+            'in_order': received == range(num_notifications)}
+
+
+def bench_reactor(num_trackers, num_gets, duration):
+    '''Several trackers served from one TrackerReactor: property get
+    round trips and pushed frames on each, how many threads that
+    takes, and how soon a waiting get fails once a tracker closes
+    the connection, while the others carry on. A connection whose
+    heartbeat can no longer be sent is dropped on its own too.
+    '''
+    threads_before = set(threading.enumerate())
+    reactor = pytribe.TrackerReactor()
+    reactor.daemon = True
+    reactor.start()
+    sims = [Simulator() for _ in range(num_trackers)]
+    try:
+        servers = [pytribe.EyeTribeServer(port=sim.port, reactor=reactor)
+                   for sim in sims]
+        # Those started for the trackers, the reactor's included.
+        threads = len(set(threading.enumerate()) - threads_before)
+        round_trips = []
+        for _ in range(num_gets):
+            for server in servers:
+                start = time()
+                server.framerate
+                round_trips.append(time() - start)
+        for server in servers:
+            server.push = True
+        sleep(0.5)
+        start_frames = [server.frame_number for server in servers]
+        start = time()
+        sleep(duration)
+        frames_per_s = [(server.frame_number - start_frame)/(time() - start)
+                        for server, start_frame in zip(servers, start_frames)]
+        for server in servers:
+            server.push = False
+        # Frames still on their way are just dropped; wait for the
+        # replies to settle before closing.
+        sleep(0.1)
+        closed = servers[0]
+        waiting = closed.tracker_q.expect(u'get', [u'framerate'])
+        start = time()
+        sims[0].__exit__(None, None, None)
+        try:
+            waiting.wait(closed.reply_timeout)
+        except pytribe.TrackerClosedError:
+            pass
+        else:
+            raise AssertionError('A get was answered after the close.')
+        failed_after = time() - start
+        try:
+            closed.framerate
+        except pytribe.TrackerClosedError:
+            pass
+        else:
+            raise AssertionError('A get after the close did not fail.')
+        # A heartbeat that cannot be sent only closes its connection.
+        broken, peer = socket.socketpair()
+        closed_broken = threading.Event()
+        def beat():
+            raise socket.error(errno.EPIPE, 'Broken pipe')
+        reactor.register(broken, LineBuffer(), lambda message: None, beat,
+                         on_close=closed_broken.set)
+        sleep(3*reactor.interval)
+        broken.close()
+        peer.close()
+        if not reactor.is_alive():
+            raise AssertionError('A failed heartbeat stopped the reactor.')
+        if not closed_broken.is_set():
+            raise AssertionError('A failed heartbeat did not close its '
+                                 'connection.')
+        # The others are none the worse for it.
+        for server in servers[1:]:
+            start_frame = server.frame_number
+            server.framerate
+            server.push = True
+            server.wait_for_frame(newer_than=start_frame, timeout=1.0)
+            server.push = False
+    finally:
+        reactor.stop()
+        reactor.join()
+        for sim in sims:
+            if sim.process.poll() is None:
+                sim.__exit__(None, None, None)
+    result = summarize_ms(round_trips)
+    result.update({'trackers': num_trackers,
+                   'threads': threads,
+                   'frames_per_s_per_tracker': min(frames_per_s),
+                   'closed_get_failed_after_ms': failed_after*1000})
+    return result
+
+
+def bench_recorders(num_frames, directory):
+    '''Frames per second and bytes per frame for each recorder.'''
+    frames = []
+    for i in range(num_frames):
+        frame = make_frame(1400000000000 + i*16, 100.0 + i, 200.0)
+        frame[u'host_time'] = 1000.0 + i*0.016
+        frames.append({u'category': u'tracker', u'request': u'get',
+                       u'statuscode': 200, u'values': {u'frame': frame}})
+    results = {}
+    text_name = os.path.join(directory, 'bench_frames.txt')
+    binary_name = os.path.join(directory, 'bench_frames.bin')
+    for name, make in (
+            ('text', lambda: recorders.TextFrameRecorder(open(text_name, 'w'))),
+            ('binary', lambda: recorders.BinaryFrameRecorder(binary_name))):
+        recorder = make()
+        file_name = recorder.file.name
+        start = time()
+        recorder.record_batch(frames)
+        recorder.close()
+        elapsed = time() - start
+        results[name] = {'frames_per_s': num_frames/elapsed,
+                         'bytes_per_frame':
+                                 os.path.getsize(file_name)*1.0/num_frames}
+        os.remove(file_name)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', default=None,
+                        help='write the JSON results here')
+    parser.add_argument('--quick', action='store_true',
+                        help='fewer samples, for a smoke test')
+    args = parser.parse_args()
+    scale = 0.1 if args.quick else 1.0
+    results = {
+            'ingest_60hz': bench_ingest(3*scale + 1, speed=1),
+            'ingest_ceiling': bench_ingest(3*scale + 1, speed=100),
+            'push_frame_latency': bench_frame_latency(int(600*scale)),
+            'pull_frame': bench_pull_frame(int(1000*scale)),
+            'get_round_trip_1_thread': bench_get_round_trip(1, int(500*scale)),
+            'get_round_trip_8_threads':
+                    bench_get_round_trip(8, int(250*scale)),
+            'state_storm': bench_state_storm(int(10000*scale)),
+            'reactor_3_trackers':
+                    bench_reactor(3, int(200*scale), 3*scale + 1),
+            'recorders': bench_recorders(int(20000*scale), HERE)}
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as file_:
+            file_.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
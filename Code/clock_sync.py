@@ -0,0 +1,121 @@
+'''
+Mapping between the eye tribe server's clock and the host's clock.
+'''
+
+import threading
+from collections import deque
+from timeit import default_timer
+
+
+class ClockSync(object):
+
+    '''Estimates host time from tracker time, passively, from the
+    frames the tracker sends anyway.
+
+    Every frame gives one (tracker time, host time of arrival) pair.
+    Over a rolling window of these, the clock skew is the median of
+    the slopes between pairs half a window apart, and the offset is a
+    low percentile of what is left over. Transport delays only ever
+    make frames arrive late, so the low percentile is close to the
+    frames that arrived fastest, while a few of those arriving
+    suspiciously early cannot drag it along. Both are refit every
+    {refit_every} frames, and to_host() is a couple of arithmetic
+    operations on the current fit.
+    '''
+
+    def __init__(self,
+                 clock=default_timer,
+                 window=600,
+                 refit_every=30,
+                 min_samples=30,
+                 offset_percentile=10):
+        '''Initialize the class.
+
+        Keyword arguments:
+        clock -- the host clock, in seconds (default timeit's
+            default_timer, the best resolution clock on each platform)
+        window -- number of recent frames to fit over (default 600,
+            i.e. 10 s at 60 Hz)
+        refit_every -- frames between refits (default 30)
+        min_samples -- frames needed before the first fit (default 30)
+        offset_percentile -- which percentile of the residuals is the
+            offset (default 10)
+        '''
+        self.clock = clock
+        self.refit_every = refit_every
+        self.min_samples = min_samples
+        self.offset_percentile = offset_percentile
+        self.ready = threading.Event()
+        self._samples = deque(maxlen=window)
+        self._since_refit = 0
+        self._last_tracker_time = None
+        # (tracker reference in s, host time at reference, skew)
+        self._fit = None
+
+    def add(self, tracker_ms, host_time=None):
+        '''Add one frame's tracker time (in ms) and the host time it
+        arrived at (default: now).
+        '''
+        if host_time is None:
+            host_time = self.clock()
+        if tracker_ms == self._last_tracker_time:
+            # The same frame again, e.g. pulled twice.
+            return
+        self._last_tracker_time = tracker_ms
+        self._samples.append((tracker_ms/1000.0, host_time))
+        self._since_refit += 1
+        if (len(self._samples) >= self.min_samples and
+            (self._fit is None or self._since_refit >= self.refit_every)):
+            self._refit()
+
+    def to_host(self, tracker_ms):
+        '''The host time a tracker time corresponds to, or None until
+        enough frames have been seen.
+        '''
+        fit = self._fit
+        if fit is None:
+            return None
+        reference, host_at_reference, skew = fit
+        return host_at_reference + skew*(tracker_ms/1000.0 - reference)
+
+    @property
+    def offset(self):
+        '''Host time minus tracker time in seconds, right now, or None
+        until enough frames have been seen.
+        '''
+        fit = self._fit
+        if fit is None:
+            return None
+        reference, host_at_reference, skew = fit
+        now = self.clock()
+        tracker_now = reference + (now - host_at_reference)/skew
+        return now - tracker_now
+
+    @property
+    def skew(self):
+        '''Host seconds per tracker second, or None.'''
+        fit = self._fit
+        if fit is None:
+            return None
+        return fit[2]
+
+    def _refit(self):
+        samples = list(self._samples)
+        half = len(samples)//2
+        slopes = []
+        for i in range(len(samples) - half):
+            x0, y0 = samples[i]
+            x1, y1 = samples[i + half]
+            if x1 != x0:
+                slopes.append((y1 - y0)/(x1 - x0))
+        if slopes:
+            slopes.sort()
+            skew = slopes[len(slopes)//2]
+        else:
+            skew = 1.0
+        reference = samples[-1][0]
+        residuals = sorted(y - skew*(x - reference) for x, y in samples)
+        index = len(residuals)*self.offset_percentile//100
+        self._fit = (reference, residuals[index], skew)
+        self._since_refit = 0
+        self.ready.set()
@@ -0,0 +1,109 @@
+'''
+Paces a screen off the times its window flips, and keeps track of
+when each of its frames went up and how many were dropped.
+'''
+
+import time
+
+DEFAULT_FRAME_PERIOD = 1/60.0
+
+
+class FrameScheduler(object):
+
+    '''Flips a screen's window, or waits out a frame without flipping,
+    and records the flips.
+
+    window.flip() blocks until the vertical blank, so a screen that
+    draws and flips on every pass of its loop already runs at the
+    display's rate; sleeping on top of that only makes it miss every
+    other blank. A screen whose picture has not changed need not flip
+    at all, since the display keeps showing the last frame. For those
+    passes, idle() sleeps until the next vertical blank, worked out
+    from the last flip, so the screen still looks at its input once a
+    frame.
+
+    After start(), flip_times has the time of every flip, on the
+    window's clock; the first is the screen's onset. dropped counts
+    the vertical blanks missed by flips that should have made the one
+    after the last flip or idle().
+    '''
+
+    def __init__(self,
+                 window,
+                 frame_period=None,
+                 clock=time.time,
+                 sleep=time.sleep):
+        '''Initialize the class.
+
+        Keyword arguments:
+        window -- has a flip() that blocks until the vertical blank
+            and returns when it was, like psychopy's Window
+        frame_period -- seconds between vertical blanks (default the
+            window's monitorFramePeriod, or 1/60)
+        clock -- the clock the window's flip() times are on, read
+            instead when flip() returns None (default time.time)
+        sleep -- (default time.sleep)
+        '''
+        self.window = window
+        if frame_period is None:
+            frame_period = (getattr(window, 'monitorFramePeriod', None) or
+                            DEFAULT_FRAME_PERIOD)
+        self.frame_period = frame_period
+        self.clock = clock
+        self.sleep = sleep
+        self.start()
+
+    def start(self):
+        '''Forget the frames of the last run of the screen.'''
+        self.flip_times = []
+        self.dropped = 0
+        # When the next flip should be, at the latest.
+        self._deadline = None
+
+    @property
+    def onset(self):
+        '''When the screen's first frame went up, or None.'''
+        return self.flip_times[0] if self.flip_times else None
+
+    def flip(self):
+        '''Flip the window, and return when it flipped.'''
+        flip_time = self.window.flip()
+        if flip_time is None:
+            flip_time = self.clock()
+        if self._deadline is not None:
+            missed = int((flip_time - self._deadline)/self.frame_period + 0.5)
+            if missed > 0:
+                self.dropped += missed
+        self.flip_times.append(flip_time)
+        self._deadline = flip_time + self.frame_period
+        return flip_time
+
+    def idle(self, work=None):
+        '''Sleep until the next vertical blank, without flipping.
+
+        Keyword arguments:
+        work -- a function to call first with the seconds left until
+            the blank, to get something done in them, e.g. uploading
+            a texture (default None)
+        '''
+        now = self.clock()
+        if self.flip_times:
+            last = self.flip_times[-1]
+            blank = last + self.frame_period*(
+                    int((now - last)/self.frame_period) + 1
+                    )
+        else:
+            blank = now + self.frame_period
+        # Flipping is what hands the window its events; do it here
+        # instead, so the OS does not take the window for hung.
+        dispatch_events = getattr(getattr(self.window, 'winHandle', None),
+                                  'dispatch_events', None)
+        if dispatch_events is not None:
+            dispatch_events()
+        if work is not None:
+            work(blank - self.clock())
+        delay = blank - self.clock()
+        if delay > 0:
+            self.sleep(delay)
+        # Drawn now, a frame should go up at the blank after this one.
+        self._deadline = blank + self.frame_period
@@ -0,0 +1,352 @@
+'''
+Compact, read-only views of the frames pushed by the eye tribe server,
+and a decoder that makes them straight from the server's messages.
+'''
+
+import json
+import re
+
+# Bits of a frame's "state".
+STATE_TRACKING_GAZE = 0x1
+STATE_TRACKING_EYES = 0x2
+STATE_TRACKING_PRESENCE = 0x4
+STATE_TRACKING_FAIL = 0x8
+STATE_TRACKING_LOST = 0x10
+
+# Where FrameSnapshot's values are in a frame, in the order
+# FrameSnapshot.from_values() takes them.
+SNAPSHOT_FIELDS = (
+        (u'time',),
+        (u'state',),
+        (u'fix',),
+        (u'avg', u'x'),
+        (u'avg', u'y'),
+        (u'lefteye', u'pcenter', u'x'),
+        (u'lefteye', u'pcenter', u'y'),
+        (u'righteye', u'pcenter', u'x'),
+        (u'righteye', u'pcenter', u'y'),
+        )
+
+# The ways the server, built with Visual C++, writes a NaN. They mean
+# the value is missing, which the frames otherwise say with 0.0.
+_WINDOWS_NAN_RE = re.compile(r'-?1\.#(?:IND|QNAN)\d*|-?nan\(ind\)')
+# For learning the layout of a frame: a JSON string, punctuation, or
+# any other value.
+_TOKEN_RE = re.compile(r'\s*("(?:[^"\\]|\\.)*"|[{}\[\]:,]|[^\s{}\[\]:,"]+)')
+_SCALAR_GROUP = r'([^\s,}]+)'
+_SCALAR = r'[^\s,}]+'
+_STRING = r'"(?:[^"\\]|\\.)*"'
+_CONSTANTS = {'true': True, 'false': False, 'null': None,
+              'NaN': float('nan'), 'Infinity': float('inf'),
+              '-Infinity': float('-inf')}
+
+
+class FrameSnapshot(object):
+
+    '''The parts of one frame that the screens need, pulled out of the
+    frame once, by the thread that received it.
+
+    Snapshots are never changed after they are made. EyeTribeServer
+    publishes each new one by swapping a single reference, so a reader
+    always sees one whole frame without taking a lock, and can keep
+    the tuples it gets without copying them.
+    '''
+
+    __slots__ = ('frame_number', 'time', 'host_time', 'state', 'fix',
+                 'avg_xy', 'left_pcenter', 'right_pcenter', 'raw')
+
+    def __init__(self, frame_number, time, host_time, state, fix,
+                 avg_xy, left_pcenter, right_pcenter, raw=None):
+        self.frame_number = frame_number
+        self.time = time
+        self.host_time = host_time
+        self.state = state
+        self.fix = fix
+        self.avg_xy = avg_xy
+        self.left_pcenter = left_pcenter
+        self.right_pcenter = right_pcenter
+        # The message the frame came in, to decode in full if anybody
+        # wants the rest of it.
+        self.raw = raw
+
+    @classmethod
+    def from_frame(cls, frame, frame_number=0):
+        '''Make a snapshot out of a frame dict.'''
+        lefteye = frame[u'lefteye'][u'pcenter']
+        righteye = frame[u'righteye'][u'pcenter']
+        return cls(frame_number,
+                   frame[u'time'],
+                   frame.get(u'host_time'),
+                   frame[u'state'],
+                   frame[u'fix'],
+                   (frame[u'avg'][u'x'], frame[u'avg'][u'y']),
+                   (lefteye[u'x'], lefteye[u'y']),
+                   (righteye[u'x'], righteye[u'y']))
+
+    @classmethod
+    def from_values(cls, values, frame_number=0, host_time=None, raw=None):
+        '''Make a snapshot out of the values of SNAPSHOT_FIELDS, as
+        FrameDecoder.decode() returns them.
+        '''
+        (time, state, fix, avg_x, avg_y, left_x, left_y, right_x,
+         right_y) = values
+        return cls(frame_number, time, host_time, state, fix,
+                   (avg_x, avg_y), (left_x, left_y), (right_x, right_y),
+                   raw)
+
+    def message(self):
+        '''The whole message the frame came in, decoded, with its
+        host_time filled in. None for snapshots made without {raw},
+        e.g. with from_frame().
+        '''
+        if self.raw is None:
+            return None
+        msg = decode_message(self.raw)
+        msg[u'values'][u'frame'][u'host_time'] = self.host_time
+        return msg
+
+    @property
+    def frame(self):
+        '''The whole frame, decoded. See message().'''
+        msg = self.message()
+        return None if msg is None else msg[u'values'][u'frame']
+
+    @property
+    def pupil_locations(self):
+        '''((left x, left y), (right x, right y)), normalized.'''
+        return (self.left_pcenter, self.right_pcenter)
+
+    @property
+    def tracking_gaze(self):
+        return bool(self.state & STATE_TRACKING_GAZE)
+
+    @property
+    def tracking_eyes(self):
+        return bool(self.state & STATE_TRACKING_EYES)
+
+    @property
+    def valid(self):
+        '''Whether the gaze coordinates can be trusted.'''
+        return (bool(self.state & STATE_TRACKING_GAZE) and
+                not self.state & (STATE_TRACKING_FAIL | STATE_TRACKING_LOST))
+
+    def __repr__(self):
+        return 'FrameSnapshot({}, time={}, avg_xy={})'.format(
+                self.frame_number, self.time, self.avg_xy
+                )
+
+
+class FrameDecoder(object):
+
+    '''Pulls just the fields it is given out of a frame message from
+    the server, without decoding the rest of it.
+
+    The server writes every frame the same way, with the same keys in
+    the same order. So once a frame has been read by finding its
+    fields one by one, the decoder compiles a regular expression that
+    matches frames laid out like it and captures just the fields, and
+    reads the frames after it with that, in a single call into C.
+    That is several times quicker than json.loads(), which builds a
+    dict for every eye and point in the frame. A frame laid out any
+    other way is read the slow way again, and becomes the new layout.
+
+    Not thread-safe; give every thread a decoder of its own.
+    '''
+
+    def __init__(self, fields=SNAPSHOT_FIELDS):
+        '''Initialize the class.
+
+        Keyword arguments:
+        fields -- the path of keys to each field wanted, starting in
+            the frame (default SNAPSHOT_FIELDS)
+        '''
+        self.fields = fields
+        self._tree = _compile(
+                [(path, index) for index, path in enumerate(fields)]
+                )
+        # The layout of the last frame read, how to read each of its
+        # groups, and which group each field is.
+        self._layout = None
+        self._converters = ()
+        self._layout_groups = ()
+
+    def decode(self, raw):
+        '''Return a list of the values of the fields in {raw}, or None
+        if it is not a frame message, or not one this can read. Those
+        need decoding in full, with decode_message().
+
+        Missing values written as NaN the Windows way (-1.#IND) come
+        out as 0.0, as with decode_message().
+        '''
+        if self._layout is not None:
+            match = self._layout.match(raw)
+            if match is not None:
+                tokens = match.groups()
+                try:
+                    values = [convert(token) for convert, token
+                              in zip(self._converters, tokens)]
+                except ValueError:
+                    # e.g. a NaN, where the last frame had a number
+                    values = [_convert(token) for token in tokens]
+                return [values[group] for group in self._layout_groups]
+        values = self._find_fields(raw)
+        if values is not None:
+            self._layout, self._converters, self._layout_groups = \
+                    _learn_layout(raw, self.fields)
+        return values
+
+    def _find_fields(self, raw):
+        start = raw.find('"frame"')
+        if start == -1:
+            return None
+        start = _value_start(raw, start + 7)
+        if start == -1 or raw[start] != '{':
+            return None
+        values = [None]*len(self.fields)
+        if not _decode_object(raw, start + 1, self._tree, values):
+            return None
+        return values
+
+
+def decode_message(raw):
+    '''Decode a whole message from the server. NaNs written the
+    Windows way (-1.#IND) are read as 0.0.
+    '''
+    # Only copied in the rare message that has one.
+    if _WINDOWS_NAN_RE.search(raw) is not None:
+        raw = _WINDOWS_NAN_RE.sub('0.0', raw)
+    return json.loads(raw)
+
+
+def _learn_layout(raw, fields):
+    # A regular expression that matches messages laid out like {raw}
+    # up to the last of the {fields}, with a group for each of them,
+    # a function to read each group with, and the index of the group
+    # of each field. (None, (), ()) if {raw} has anything in it this
+    # cannot cope with, such as a list.
+    wanted = dict((path, index) for index, path in enumerate(fields))
+    pattern = []
+    groups = []
+    converters = []
+    end_of_last_group = 0
+    keys = []
+    key = None
+    for match in _TOKEN_RE.finditer(raw):
+        token = match.group(1)
+        # The same whitespace as in {raw}; a frame with different
+        # whitespace is just read the slow way.
+        pattern.append(re.escape(raw[match.start():match.start(1)]))
+        if token in ('[', ']'):
+            return None, (), ()
+        if token == '{':
+            if key is not None:
+                keys.append(key)
+            key = None
+            pattern.append(r'\{')
+        elif token == '}':
+            if keys:
+                keys.pop()
+            pattern.append(r'\}')
+        elif token in (':', ','):
+            pattern.append(token)
+        elif key is None and token.startswith('"'):
+            key = token[1:-1]
+            pattern.append(re.escape(token))
+        else:
+            # A value
+            path = tuple(keys[2:]) + (key,)
+            if keys[:2] == [u'values', u'frame'] and path in wanted:
+                pattern.append(_SCALAR_GROUP)
+                groups.append(wanted[path])
+                converters.append(_converter(token))
+                end_of_last_group = len(pattern)
+            elif token.startswith('"'):
+                pattern.append(_STRING)
+            else:
+                pattern.append(_SCALAR)
+            key = None
+    if len(groups) != len(fields):
+        return None, (), ()
+    return (re.compile(''.join(pattern[:end_of_last_group])),
+            tuple(converters),
+            tuple(groups.index(index) for index in range(len(fields))))
+
+
+def _compile(fields):
+    # A tree of (quoted key, index of the field or None, subtree),
+    # so that fields with the same object on their way share it.
+    children = {}
+    order = []
+    for path, index in fields:
+        if path[0] not in children:
+            children[path[0]] = [None, []]
+            order.append(path[0])
+        if len(path) == 1:
+            children[path[0]][0] = index
+        else:
+            children[path[0]][1].append((path[1:], index))
+    return tuple(('"{}"'.format(key), children[key][0],
+                  _compile(children[key][1]) if children[key][1] else ())
+                 for key in order)
+
+
+def _decode_object(raw, start, tree, values):
+    # Fill in {values} from the object that starts at {start}, just
+    # after its {. Returns False if a field is missing or not what it
+    # should be.
+    for key, index, subtree in tree:
+        pos = raw.find(key, start)
+        # Skip keys of objects nested in this one: up to one of its
+        # own keys, there are as many { as }. Frames have no strings
+        # with braces in them.
+        while pos != -1 and (raw.count('{', start, pos) !=
+                             raw.count('}', start, pos)):
+            pos = raw.find(key, pos + len(key))
+        if pos == -1:
+            return False
+        value_start = _value_start(raw, pos + len(key))
+        if value_start == -1:
+            return False
+        if subtree:
+            if raw[value_start] != '{':
+                return False
+            if not _decode_object(raw, value_start + 1, subtree, values):
+                return False
+            continue
+        end = raw.find(',', value_start)
+        brace = raw.find('}', value_start, len(raw) if end == -1 else end)
+        if brace != -1:
+            end = brace
+        values[index] = _convert(raw[value_start:end].rstrip())
+    return True
+
+
+def _value_start(raw, after_key):
+    # Where the value of the key that ends at {after_key} starts.
+    colon = raw.find(':', after_key)
+    if colon == -1:
+        return -1
+    start = colon + 1
+    while raw[start:start+1] in (' ', '\t', '\r', '\n'):
+        start += 1
+    return start
+
+
+def _converter(token):
+    # The quickest way to read values written like {token}.
+    if token in _CONSTANTS or '#' in token or '(' in token:
+        return _convert
+    if '.' in token or 'e' in token or 'E' in token:
+        return float
+    return int
+
+
+def _convert(token):
+    if token in _CONSTANTS:
+        return _CONSTANTS[token]
+    if '#' in token or '(' in token:
+        # A Windows NaN
+        return 0.0
+    if '.' in token or 'e' in token or 'E' in token:
+        return float(token)
+    return int(token)
@@ -0,0 +1,100 @@
+'''
+Newline-delimited message framing for stream sockets.
+
+A single recv() can return half a message, several messages, or
+several messages and half of the next one. LineBuffer holds on to the
+incomplete tail until the rest of it arrives.
+
+The handler and its clients send each message as one line of JSON,
+made with encode() and read back with decode().
+'''
+
+import json
+
+
+def encode(message):
+    '''A message as one line of compact JSON, ready to send.'''
+    return json.dumps(message, separators=(',', ':')) + '\n'
+
+
+def decode(line):
+    '''The message in one line returned by LineBuffer.
+
+    Raises ValueError if the line is not a JSON object.
+    '''
+    message = json.loads(line)
+    if not isinstance(message, dict):
+        raise ValueError('Not a JSON object: {!r}'.format(line[:80]))
+    return message
+
+
+class LineBuffer(object):
+
+    '''Reassembles newline-delimited messages from a byte stream.
+
+    Incoming bytes are received straight into a preallocated chunk
+    and appended to a single bytearray. Complete messages are sliced
+    off the front of it once per recv, so an incomplete tail is never
+    copied more than once no matter how many recvs it takes to arrive.
+    '''
+
+    def __init__(self, bufsize=4096, delimiter=b'\n'):
+        '''Initialize the buffer.
+
+        Keyword arguments:
+        bufsize -- the largest number of bytes to take from the socket
+            in one recv (default 4096)
+        delimiter -- the bytes separating messages (default newline)
+        '''
+        self.delimiter = delimiter
+        self._chunk = bytearray(bufsize)
+        self._chunk_view = memoryview(self._chunk)
+        self._buffer = bytearray()
+        # Everything before this index is known not to contain a
+        # delimiter, so we don't search it again.
+        self._scan_from = 0
+
+    def __len__(self):
+        '''The number of buffered bytes not yet part of a message.'''
+        return len(self._buffer)
+
+    def feed(self, data):
+        '''Add data to the buffer and return a list of every message
+        it completed, without delimiters. Empty messages are dropped.
+        '''
+        self._buffer.extend(data)
+        return self._split()
+
+    def recv_from(self, sock):
+        '''Receive once from sock and return the completed messages.
+
+        Returns None if the other end closed the connection.
+        '''
+        nbytes = sock.recv_into(self._chunk)
+        if nbytes == 0:
+            return None
+        return self.feed(self._chunk_view[:nbytes])
+
+    def clear(self):
+        '''Throw away any incomplete message.'''
+        del self._buffer[:]
+        self._scan_from = 0
+
+    def _split(self):
+        messages = []
+        buffer_ = self._buffer
+        delimiter = self.delimiter
+        size = len(delimiter)
+        start = 0
+        end = buffer_.find(delimiter, self._scan_from)
+        while end != -1:
+            if end > start:
+                messages.append(bytes(buffer_[start:end]))
+            start = end + size
+            end = buffer_.find(delimiter, start)
+        if start:
+            del buffer_[:start]
+        # A delimiter of more than one byte may have only partly
+        # arrived, at the very end.
+        self._scan_from = max(len(buffer_) - size + 1, 0)
+        return messages
@@ -1,256 +1,767 @@
-'''
-Created on Jun 13, 2014
-
-@author: smedema
-'''
-
-import socket
-import threading
-from os import _exit
-from time import sleep
-from json import loads, dumps
-from socket import errno
-
-
-HOST = ''
-BUFSIZE = 4096
-PORT = 11111
-
-
-class Session(object):
-    
-    
-    def __init__(self):
-        self.lock = threading.Lock()
-        self.disconnect = threading.Event()
-        self.new_message = threading.Event()
-        self.players = []
-        self._order = []
-        self._reward_game = -1
-        self._num_players = 0
-        self.socket = socket.socket()
-        self.socket.bind((HOST, PORT))
-        self.socket.listen(0)
-        print('Experiment initialized')
-        
-    def run(self):
-        self.connect_players()
-        self.disconnect.wait()
-        for player in self.players:
-            player.socket.close()
-            player.stop()
-            player.join()
-        self.socket.close()
-    
-    @property
-    def order(self):
-        return self._order
-    @order.setter
-    def order(self, value):
-        with self.lock:
-            if self._order == []:
-                self._order = value
-    @property
-    def reward_game(self):
-        return self._reward_game
-    @reward_game.setter
-    def reward_game(self, value):
-        with self.lock:
-            if self._reward_game == -1:
-                self._reward_game = value
-    @property
-    def num_players(self):
-        return self._num_players
-    @num_players.setter
-    def num_players(self, value):
-        with self.lock:
-            if self._num_players == 0:
-                self._num_players = value
-            elif self._num_players != value:
-                #problem!
-                pass
-    @property
-    def IDs(self):
-        temp = []
-        for player in self.players:
-            temp.append(player.ID)
-        return temp
-    @property
-    def IPs(self):
-        temp = []
-        for player in self.players:
-            temp.append(player.IP)
-        return temp
-    @property
-    def all_set_up(self):
-        if len(self.players) < self.num_players:
-            return False
-        for player in self.players:
-            if not player.is_set_up:
-                return False
-        return True
-    @property
-    def all_contributions(self):
-        answer_dict = {}
-        for player in self.players:
-            answer_dict[player.IP] = player.contributions
-        return answer_dict
-
-    def connect_players(self):
-        print('Awaiting connections.')
-        self._connect_player()
-        while self.num_players == 0:
-            self.new_message.wait()
-        while len(self.players) < self.num_players:
-            self._connect_player()
-        print('All players present and accounted for.')
-    
-    def _connect_player(self):
-        conn, addr = self.socket.accept()     
-        self.players.append(PlayerThread(conn, addr, session=self))
-        print('{} connected.'.format(self.players[-1].IP))
-        self.players[-1].start()
-
-
-class PlayerThread(threading.Thread):
-    
-    
-    def __init__(self, conn, addr, session):
-        super(PlayerThread, self).__init__()
-        self.socket = conn
-        self.socket.setblocking(0)
-        self.port = addr[1]
-        self.session = session
-        
-        self.IP = addr[0]
-        self.ID = ''
-        self.is_set_up = False
-        self.contributions = []
-        
-        self._stop = threading.Event()
-     
-    def message_command(self, message_dict):
-        reply_dict = {u'category': u'handler',
-                      u'request': message_dict[u'request'],
-                      u'statuscode': 200
-                      }
-        if message_dict[u'request'] == u'quit':
-            print('Quit command recved from client.')
-            self.stop()
-            return None
-        elif message_dict[u'request'] == u'set':
-            for key, value in message_dict[u'values'].iteritems():
-                if hasattr(self, key):
-                    setattr(self, key, value)
-                elif hasattr(self.session, key):
-                    setattr(self.session, key, value)
-                else:
-                    reply_dict[u'statuscode'] = 404
-                    reply_dict[u'statusmessage'] = 'Value "{}" does not exist.'.format(key)
-        elif message_dict[u'request'] == u'append':
-            for key, value in message_dict[u'values'].iteritems():
-                if hasattr(self, key):
-                    attr_ = getattr(self, key)
-                    attr_.append(value)
-                elif hasattr(self.session, key):
-                    attr_ = getattr(self.session, key)
-                    attr_.append(value)
-                else:
-                    reply_dict[u'statuscode'] = 404
-                    reply_dict[u'statusmessage'] = 'Value "{}" does not exist.'.format(key)
-        elif message_dict[u'request'] == u'get':
-            reply_dict[u'values'] = {}
-            for key in message_dict[u'values']:
-                if hasattr(self, key):
-                    reply_dict[u'values'][key] = getattr(self, key)
-                elif hasattr(self.session, key):
-                    reply_dict[u'values'][key] = getattr(self.session, key)
-                else:
-                    reply_dict[u'values'][key] = None
-                    reply_dict[u'statuscode'] = 404
-                    reply_dict[u'statusmessage'] = 'Value does not exist.'
-        else:
-            reply_dict[u'statuscode'] = 404
-            reply_dict[u'statusmessage'] = 'Request does not exist.'.format()
-        self.session.new_message.set()
-        self.session.new_message.clear()
-        return reply_dict
-    
-    def stop(self):
-        self._stop.set()
-        
-    def run(self):
-        while not self._stop.is_set():
-            sleep(0.250)
-            try:
-                messages = self.socket.recv(BUFSIZE).split('\n')
-            except socket.error as error_:
-                if error_[0] == errno.EWOULDBLOCK:
-                    continue
-                elif error_[0] == 10054 or 104: #errno.WSAECONNRESET:
-                    print('Connection closed. Exiting...')
-                    self.stop()
-                    break
-                else:
-                    raise error_
-            for message in messages:
-                if message == '':
-                    continue
-#                 print message
-                message_dict = loads(message)
-                if message_dict[u'category'] == u'handler':
-                    reply = self.message_command(message_dict)
-                else:
-                    # something is very wrong
-                    print('Recved a message that was not handler category. '
-                          'Message:\n{}'.format(message_dict))
-                if reply is not None:
-#                     print reply
-                    try:
-                        self.socket.send('{}\n'.format(dumps(reply)))
-                    except socket.error as err_:
-                        if err_[0] == 32:
-                            print('Connection closed. Exiting...')
-                            self.stop()
-                        else:
-                            raise err_
-        self.session.disconnect.set()
-
-
-class QuitterThread(threading.Thread):
-
-    
-    def __init__(self):
-        super(QuitterThread, self).__init__()
-        self._stop = threading.Event()
-         
-    def run(self):
-        while not self._stop.is_set():
-            try:
-                _ = raw_input()
-            except Exception:
-                print('Exiting...')
-                _exit(0)
-             
-    def stop(self):
-        self._stop.set()
-        
-        
-quitter_thr = QuitterThread()
-quitter_thr.start()
-
-while not quitter_thr._stop.is_set():
-    try:
-        session = Session()
-        session.run()
-    except Exception as err_1:
-#         print('an error happened: {}'.format(err_1))
-        try:
-            for player in session.players:
-                player.socket.close()
-            session.socket.close()
-        except Exception as err_2:
-            print('another error happened: {}'.format(err_2))
-
-
-quitter_thr.join()
\ No newline at end of file
+'''
+Created on Jun 13, 2014
+
+@author: smedema
+'''
+
+import argparse
+import errno
+import select
+import socket
+import threading
+from itertools import count
+from operator import attrgetter
+from os import _exit
+from time import time
+
+from framing import LineBuffer, decode, encode
+from journal import Journal, read_journal
+
+
+HOST = ''
+BUFSIZE = 4096
+PORT = 11111
+
+
+class Server(object):
+    
+    '''Serves any number of groups of players from a single thread.
+    
+    run() waits in select() on the listening socket and every
+    player's socket at once, and answers each message as soon as it
+    arrives. A player is put into a group (see assign()) as soon as it
+    says how many players its group needs. Each group has a Session
+    of its own, which ends as soon as any of its players quits; the
+    other groups carry on. A player that loses its connection can
+    connect again and carry on where it was, unless its group has
+    ended in the meantime: then it is turned away, rather than put
+    into a new group.
+    
+    With a journal file, every change to the players' and groups'
+    state is logged to it (see journal.py) before it is made, and a
+    new Server replays it, so a restarted handler picks up every group
+    where it was when its players reconnect.
+    '''
+    
+    def __init__(self, host=HOST, port=PORT, journal_file=None):
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.players = []
+        self._by_socket = {}
+        self._group_ids = count(1)
+        self.journal = None
+        self.socket = socket.socket()
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((host, port))
+        self.socket.listen(5)
+        print('Experiment initialized')
+        if journal_file is not None:
+            self._replay(read_journal(journal_file))
+            self.journal = Journal(journal_file)
+        
+    def run(self):
+        print('Awaiting connections.')
+        try:
+            while True:
+                self._poll()
+        finally:
+            self.close()
+            
+    def close(self):
+        for player in self.players:
+            player.socket.close()
+        self.socket.close()
+        if self.journal is not None:
+            self.journal.close()
+            
+    def log(self, player, request, values):
+        '''Journal a request from a player, before it is carried out.'''
+        if self.journal is not None:
+            self.journal.write({u'group': player.session.group,
+                                u'IP': player.IP,
+                                u'ID': player.ID,
+                                u'request': request,
+                                u'values': values})
+        
+    def assign(self, player, num_players):
+        '''Put a player into a group and return its Session, or None
+        if the group asked for is full.
+        
+        A player that lost its connection to a group gets its place
+        back, going by its IP and ID. A player that set a group ID
+        joins that group. Everybody else joins the oldest group still
+        waiting for players of the same size, or starts a new one.
+        
+        If the group the player was in, or asked for, has ended, its
+        Session is returned without the player in it; see ended.
+        '''
+        with self.lock:
+            session, away = self._find_away(player)
+            if session is not None and not session.ended:
+                session.rejoin(away, player)
+        if session is not None:
+            if session.ended:
+                print('{} turned away: group {} has ended.'.format(
+                        player.IP, session.group
+                        ))
+            else:
+                print('{} rejoined group {}.'.format(player.IP, session.group))
+            return session
+        with self.lock:
+            if player.group is not None:
+                session = self.sessions.get(player.group)
+                if session is None:
+                    session = self._new_session(player.group)
+                elif session.ended:
+                    return session
+            else:
+                session = self._open_session(num_players)
+            if not session.add_player(player, num_players):
+                return None
+        if self.journal is not None:
+            self.journal.write({u'group': session.group,
+                                u'IP': player.IP,
+                                u'ID': player.ID,
+                                u'request': u'join',
+                                u'values': {u'num_players': num_players,
+                                            u'matchmade': session.matchmade}
+                                })
+        print('{} joined group {}.'.format(player.IP, session.group))
+        if len(session.players) == session.num_players:
+            print('Group {}: all players present and accounted for.'.format(
+                    session.group
+                    ))
+        return session
+    
+    def lost(self, player):
+        '''A player's connection closed. Its group keeps its place
+        until it connects again.
+        '''
+        self._disconnect(player)
+        if player.session is not None:
+            print('{} left group {}, waiting for it to come back.'.format(
+                    player.IP, player.session.group
+                    ))
+    
+    def end(self, player):
+        '''A player quit, which ends its group. The other players are
+        told so and dropped. The group is kept, marked ended, so that
+        they are turned away if they connect again.
+        '''
+        session = player.session
+        with self.lock:
+            ended = (session is not None and not session.ended and
+                     self.sessions.get(session.group) is session)
+            if ended:
+                session.ended = True
+        if not ended:
+            self._disconnect(player)
+            return
+        if self.journal is not None:
+            self.journal.write({u'group': session.group,
+                                u'IP': player.IP,
+                                u'ID': player.ID,
+                                u'request': u'end'})
+        message = {u'category': u'handler',
+                   u'request': u'group_ended',
+                   u'statuscode': 410,
+                   u'values': {u'group': session.group}}
+        for player_ in session.players:
+            if player_ is not player:
+                player_.send(message)
+            self._disconnect(player_)
+        print('Group {} ended.'.format(session.group))
+    
+    def _find_away(self, player):
+        for session in self.sessions.itervalues():
+            if player.group is not None and player.group != session.group:
+                continue
+            for player_ in session.players:
+                if (player_.socket is None and player_.IP == player.IP and
+                    player_.ID == player.ID):
+                    return session, player_
+        return None, None
+    
+    def _replay(self, entries):
+        '''Rebuild the groups from journal entries. Their players are
+        all away until they connect again.
+        '''
+        for entry in entries:
+            group = entry[u'group']
+            request = entry[u'request']
+            if request == u'join':
+                session = self.sessions.get(group)
+                if session is None:
+                    session = self._new_session(group)
+                    session.matchmade = entry[u'values'][u'matchmade']
+                player = Player(None, (entry[u'IP'], None), server=self)
+                player.ID = entry[u'ID']
+                if not session.matchmade:
+                    player.group = group
+                session.add_player(player, entry[u'values'][u'num_players'])
+            elif request == u'end':
+                if group in self.sessions:
+                    self.sessions[group].ended = True
+            elif group in self.sessions:
+                for player in self.sessions[group].players:
+                    if (player.IP, player.ID) == (entry[u'IP'], entry[u'ID']):
+                        player.apply(request, entry[u'values'])
+                        break
+        restored = [session for session in self.sessions.itervalues()
+                    if not session.ended]
+        for session in restored:
+            # Catch up on the rounds completed, with nobody to tell.
+            session.check_rounds()
+        if restored:
+            print('Restored groups {} from the journal.'.format(
+                    ', '.join(sorted(session.group for session in restored))
+                    ))
+    
+    def _open_session(self, num_players):
+        for session in sorted(self.sessions.itervalues(),
+                              key=lambda session: session.created):
+            if (session.num_players == num_players and
+                len(session.players) < num_players and
+                session.matchmade and not session.ended):
+                return session
+        group = u'{}'.format(next(self._group_ids))
+        while group in self.sessions:
+            group = u'{}'.format(next(self._group_ids))
+        session = self._new_session(group)
+        session.matchmade = True
+        return session
+    
+    def _new_session(self, group):
+        session = Session(group)
+        self.sessions[group] = session
+        return session
+    
+    def _disconnect(self, player):
+        if player.socket is None:
+            return
+        if player.socket in self._by_socket:
+            del self._by_socket[player.socket]
+            self.players.remove(player)
+        player.socket.close()
+        player.socket = None
+    
+    def _poll(self):
+        readers = [player.socket for player in self.players]
+        readers.append(self.socket)
+        writers = [player.socket for player in self.players
+                   if player.outgoing]
+        readable, writable, _ = select.select(readers, writers, [])
+        for sock in writable:
+            # The player may have been dropped along with its group.
+            if sock in self._by_socket:
+                self._by_socket[sock].flush()
+        for sock in readable:
+            if sock is self.socket:
+                self._connect_player()
+            elif sock in self._by_socket:
+                self._by_socket[sock].read()
+    
+    def _connect_player(self):
+        conn, addr = self.socket.accept()
+        player = Player(conn, addr, server=self)
+        self.players.append(player)
+        self._by_socket[conn] = player
+        print('{} connected.'.format(player.IP))
+
+
+class Session(object):
+    
+    '''The shared state of one group of players.'''
+    
+    def __init__(self, group):
+        self.group = group
+        self.created = time()
+        # Whether the Server put players in here, rather than the
+        # players asking for this group by its ID.
+        self.matchmade = False
+        # Set once a player has quit. The Server keeps ended groups,
+        # so that their players cannot join them, or start new ones,
+        # by connecting again.
+        self.ended = False
+        self.lock = threading.Lock()
+        self.players = []
+        self._order = []
+        self._reward_game = -1
+        self._num_players = 0
+        self._rounds_complete = 0
+        # IDs, IPs, all_set_up and all_contributions, built the first
+        # time they are asked for and dropped by invalidate() whenever
+        # what they are built from changes.
+        self._views = {}
+        # Every contribution as [IP, round, contribution], in the order
+        # they came in. The session's version is the length of this.
+        self._contribution_log = []
+        
+    def add_player(self, player, num_players):
+        '''Add a player unless the group is full. The first player
+        decides how many players the group has.
+        '''
+        with self.lock:
+            if self._num_players == 0:
+                self._num_players = num_players
+            if len(self.players) >= self._num_players:
+                return False
+            self.players.append(player)
+            self.invalidate()
+        player.session = self
+        return True
+    
+    def rejoin(self, away, player):
+        '''Give the place of a player that lost its connection to the
+        same player on a new one, and tell it about the last round
+        completed in case it missed it.
+        '''
+        with self.lock:
+            self.players[self.players.index(away)] = player
+        player.group = away.group
+        player.is_set_up = away.is_set_up
+        player.contributions = away.contributions
+        player.session = self
+        self.invalidate()
+        if self._rounds_complete:
+            player.send(self._round_message(self._rounds_complete))
+    
+    def invalidate(self, view=None):
+        '''Drop {view}, or all the views built from the players'
+        values, after one of them changed.
+        '''
+        if view is None:
+            self._views.clear()
+        else:
+            self._views.pop(view, None)
+    
+    @property
+    def order(self):
+        return self._order
+    @order.setter
+    def order(self, value):
+        with self.lock:
+            if self._order == []:
+                self._order = value
+    @property
+    def reward_game(self):
+        return self._reward_game
+    @reward_game.setter
+    def reward_game(self, value):
+        with self.lock:
+            if self._reward_game == -1:
+                self._reward_game = value
+    @property
+    def num_players(self):
+        return self._num_players
+    @num_players.setter
+    def num_players(self, value):
+        with self.lock:
+            if self._num_players == 0:
+                self._num_players = value
+                self.invalidate()
+            elif self._num_players != value:
+                #problem!
+                pass
+    @property
+    def IDs(self):
+        if u'IDs' not in self._views:
+            self._views[u'IDs'] = [player.ID for player in self.players]
+        return self._views[u'IDs']
+    @property
+    def IPs(self):
+        if u'IPs' not in self._views:
+            self._views[u'IPs'] = [player.IP for player in self.players]
+        return self._views[u'IPs']
+    @property
+    def all_set_up(self):
+        if u'all_set_up' not in self._views:
+            self._views[u'all_set_up'] = (
+                    len(self.players) >= self.num_players and
+                    all(player.is_set_up for player in self.players)
+                    )
+        return self._views[u'all_set_up']
+    @property
+    def all_contributions(self):
+        if u'all_contributions' not in self._views:
+            self._views[u'all_contributions'] = dict(
+                    (player.IP, player.contributions)
+                    for player in self.players
+                    )
+        return self._views[u'all_contributions']
+    @property
+    def version(self):
+        return len(self._contribution_log)
+    
+    def log_contribution(self, player, contribution):
+        self._contribution_log.append(
+                [player.IP, len(player.contributions), contribution]
+                )
+        self.invalidate(u'all_contributions')
+        
+    def contributions_since(self, version):
+        '''Return the current version and the contributions made
+        after {version}, as [IP, round, contribution] lists. Rounds are
+        counted from 1 over all games.
+        '''
+        return self.version, self._contribution_log[max(version, 0):]
+    
+    def check_rounds(self):
+        '''Push a round_complete message to every player for each
+        round that all of them have now contributed to. Its values
+        are the round number, counting from 1 over all games, and the
+        contribution of every player by IP, like all_contributions.
+        '''
+        if self.num_players == 0 or len(self.players) < self.num_players:
+            return
+        num_rounds = min(len(player.contributions)
+                         for player in self.players)
+        while self._rounds_complete < num_rounds:
+            self._rounds_complete += 1
+            self.broadcast(self._round_message(self._rounds_complete))
+    
+    def _round_message(self, round_number):
+        contributions = {}
+        for player in self.players:
+            contributions[player.IP] = player.contributions[round_number-1]
+        return {u'category': u'handler',
+                u'request': u'round_complete',
+                u'statuscode': 200,
+                u'values': {u'round': round_number,
+                            u'contributions': contributions}
+                }
+    
+    def broadcast(self, message_dict):
+        for player in self.players:
+            player.send(message_dict)
+
+
+class Player(object):
+    
+    '''The handler's end of one player's connection.'''
+    
+    def __init__(self, conn, addr, server):
+        # None while the player is not connected, e.g. when restored
+        # from the journal.
+        self.socket = conn
+        if conn is not None:
+            self.socket.setblocking(0)
+            # Replies and pushes are small and often back to back, so
+            # don't let Nagle hold them up waiting for delayed ACKs.
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.port = addr[1]
+        self.server = server
+        # Set once the server has put the player into a group.
+        self.session = None
+        self.line_buffer = LineBuffer(BUFSIZE)
+        self.outgoing = bytearray()
+        
+        self.IP = addr[0]
+        self.ID = ''
+        self.group = None
+        self.is_set_up = False
+        self.contributions = []
+     
+    def message_command(self, message_dict):
+        reply_dict = {u'category': u'handler',
+                      u'request': message_dict[u'request'],
+                      u'statuscode': 200
+                      }
+        if u'id' in message_dict:
+            reply_dict[u'id'] = message_dict[u'id']
+        handler = self._requests.get(message_dict[u'request'])
+        if handler is None:
+            reply_dict[u'statuscode'] = 404
+            reply_dict[u'statusmessage'] = 'Request does not exist.'
+            return reply_dict
+        return handler(self, message_dict, reply_dict)
+    
+    def _quit(self, message_dict, reply_dict):
+        print('Quit command recved from client.')
+        self.stop()
+        return None
+    
+    def _update(self, message_dict, reply_dict):
+        request = message_dict[u'request']
+        values = message_dict[u'values']
+        num_players = None
+        if request == u'set' and self.session is None:
+            # The player is put into a group once it says how many
+            # players there are, after the rest (e.g. which group) has
+            # been set.
+            values = dict(values)
+            num_players = values.pop(u'num_players', None)
+        elif self.session is not None:
+            # Write-ahead: journal the change before making it.
+            self.server.log(self, request, values)
+        rejected = self.apply(request, values)
+        if rejected:
+            reply_dict[u'statuscode'], reply_dict[u'statusmessage'] = \
+                    self._rejection(rejected[-1], request)
+        if num_players is not None:
+            session = self.server.assign(self, num_players)
+            if session is None:
+                reply_dict[u'statuscode'] = 409
+                reply_dict[u'statusmessage'] = 'Group "{}" is full.'.format(self.group)
+            elif session.ended:
+                reply_dict[u'statuscode'] = 410
+                reply_dict[u'statusmessage'] = 'Group "{}" has ended.'.format(session.group)
+        if request == u'append' and self.session is not None:
+            self.session.check_rounds()
+        return reply_dict
+    
+    def _get(self, message_dict, reply_dict):
+        reply_dict[u'values'] = {}
+        for key in message_dict[u'values']:
+            field = FIELDS.get(key)
+            if (field is None or field.get is None or
+                (field.of_group and self.session is None)):
+                reply_dict[u'values'][key] = None
+                reply_dict[u'statuscode'], reply_dict[u'statusmessage'] = \
+                        self._rejection(key, u'get')
+            else:
+                reply_dict[u'values'][key] = field.get(self)
+        return reply_dict
+    
+    def _get_since(self, message_dict, reply_dict):
+        if self.session is None:
+            reply_dict[u'statuscode'] = 404
+            reply_dict[u'statusmessage'] = 'Not in a group yet.'
+            return reply_dict
+        # Only what changed since the version the client already has,
+        # instead of the whole of all_contributions.
+        version, contributions = self.session.contributions_since(
+                message_dict[u'values'][u'version']
+                )
+        reply_dict[u'values'] = {u'version': version,
+                                 u'contributions': contributions}
+        return reply_dict
+    
+    _requests = {u'quit': _quit,
+                 u'set': _update,
+                 u'append': _update,
+                 u'get': _get,
+                 u'get_since': _get_since}
+    
+    def apply(self, request, values):
+        '''Carry out a set or append on this player's values or its
+        group's, and return the keys that it may not set or append to.
+        '''
+        rejected = []
+        for key, value in values.iteritems():
+            field = FIELDS.get(key)
+            action = None
+            if field is not None and not (field.of_group and
+                                          self.session is None):
+                action = field.set if request == u'set' else field.append
+            if action is None:
+                rejected.append(key)
+            else:
+                action(self, value)
+        return rejected
+    
+    def _rejection(self, key, request):
+        '''The statuscode and statusmessage for a request on {key}
+        that apply() or _get() turned down.
+        '''
+        field = FIELDS.get(key)
+        if field is None:
+            return 404, 'Value "{}" does not exist.'.format(key)
+        if field.of_group and self.session is None:
+            return 404, 'Value "{}" needs a group; not in one yet.'.format(key)
+        return 403, 'Value "{}" cannot be used with {}.'.format(key, request)
+    
+    def stop(self):
+        '''End the session this player is in.'''
+        self.server.end(self)
+        
+    def read(self):
+        '''Answer every message that has arrived. Only called once
+        select() says there is something to read.
+        '''
+        try:
+            messages = self.line_buffer.recv_from(self.socket)
+        except socket.error:
+            messages = None
+        if messages is None:
+            print('Connection to {} closed.'.format(self.IP))
+            self.server.lost(self)
+            return
+        for message in messages:
+#             print message
+            reply = None
+            try:
+                message_dict = decode(message)
+                if message_dict.get(u'category') == u'handler':
+                    reply = self.message_command(message_dict)
+                else:
+                    # something is very wrong
+                    print('Recved a message that was not handler category. '
+                          'Message:\n{}'.format(message_dict))
+            except Exception as err_:
+                # Everybody's session runs on this thread, so one bad
+                # message must not take it down.
+                print('Could not handle a message from {}: {}'.format(
+                        self.IP, err_
+                        ))
+                reply = {u'category': u'handler',
+                         u'statuscode': 400,
+                         u'statusmessage': 'Malformed request.'}
+            if reply is not None:
+#                 print reply
+                self.outgoing.extend(encode(reply))
+        self.flush()
+        
+    def send(self, message_dict):
+        if self.socket is None:
+            return
+        self.outgoing.extend(encode(message_dict))
+        self.flush()
+        
+    def flush(self):
+        '''Send as much of the outgoing data as the socket takes
+        without blocking. The rest is sent once select() says the
+        socket is writable again.
+        '''
+        if not self.outgoing or self.socket is None:
+            return
+        try:
+            sent = self.socket.send(self.outgoing)
+        except socket.error as err_:
+            if err_.errno in (errno.EWOULDBLOCK, errno.EAGAIN):
+                return
+            print('Connection to {} closed.'.format(self.IP))
+            self.server.lost(self)
+            return
+        del self.outgoing[:sent]
+
+
+class Field(object):
+    
+    '''A value players may get, set or append to.
+    
+    get, set and append are what to do for each request, as functions
+    of the Player (and for set and append, the value), or None where
+    the request is not allowed. Values of the group (of_group) are
+    only there once the player is in one.
+    '''
+    
+    __slots__ = ('name', 'of_group', 'get', 'set', 'append')
+    
+    def __init__(self, name, of_group=False, get=None, set=None,
+                 append=None):
+        self.name = name
+        self.of_group = of_group
+        self.get = get
+        self.set = set
+        self.append = append
+
+
+def _set_player_value(name):
+    def set_(player, value):
+        # Stations keep setting the same value, e.g. is_set_up, which
+        # need not throw away the views.
+        if getattr(player, name) == value:
+            return
+        setattr(player, name, value)
+        if player.session is not None:
+            player.session.invalidate()
+    return set_
+
+
+def _set_group_value(name):
+    return lambda player, value: setattr(player.session, name, value)
+
+
+def _append_contribution(player, contribution):
+    player.contributions.append(contribution)
+    if player.session is not None:
+        player.session.log_contribution(player, contribution)
+
+
+# Everything players may get, set or append to. Anything else, such
+# as the sockets, is none of their business.
+FIELDS = dict((field.name, field) for field in [
+        Field(u'IP', get=attrgetter('IP')),
+        Field(u'ID', get=attrgetter('ID'), set=_set_player_value('ID')),
+        Field(u'group', get=attrgetter('group'),
+              set=_set_player_value('group')),
+        Field(u'is_set_up', get=attrgetter('is_set_up'),
+              set=_set_player_value('is_set_up')),
+        Field(u'contributions', get=attrgetter('contributions'),
+              append=_append_contribution),
+        Field(u'num_players', of_group=True,
+              get=attrgetter('session.num_players'),
+              set=_set_group_value('num_players')),
+        Field(u'order', of_group=True, get=attrgetter('session.order'),
+              set=_set_group_value('order')),
+        Field(u'reward_game', of_group=True,
+              get=attrgetter('session.reward_game'),
+              set=_set_group_value('reward_game')),
+        Field(u'IDs', of_group=True, get=attrgetter('session.IDs')),
+        Field(u'IPs', of_group=True, get=attrgetter('session.IPs')),
+        Field(u'all_set_up', of_group=True,
+              get=attrgetter('session.all_set_up')),
+        Field(u'all_contributions', of_group=True,
+              get=attrgetter('session.all_contributions')),
+        Field(u'version', of_group=True, get=attrgetter('session.version')),
+        ])
+
+
+class QuitterThread(threading.Thread):
+
+    
+    def __init__(self):
+        super(QuitterThread, self).__init__()
+        self._stop = threading.Event()
+        self.daemon = True
+        # The Server running, whose journal to close before exiting.
+        self.server = None
+         
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                _ = raw_input()
+            except Exception:
+                print('Exiting...')
+                server = self.server
+                if server is not None and server.journal is not None:
+                    server.journal.close()
+                _exit(0)
+             
+    def stop(self):
+        self._stop.set()
+        
+        
+def main():
+    parser = argparse.ArgumentParser(
+            description='Serve any number of groups of players at once.'
+            )
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--journal', default=None,
+                        help='log the session state here and pick up '
+                             'where it left off after a restart; use a '
+                             'new file for every lab session')
+    args = parser.parse_args()
+    
+    quitter_thr = QuitterThread()
+    quitter_thr.start()
+    
+    while not quitter_thr._stop.is_set():
+        server = None
+        try:
+            server = Server(args.host, args.port, args.journal)
+            quitter_thr.server = server
+            server.run()
+        except Exception as err_1:
+#             print('an error happened: {}'.format(err_1))
+            try:
+                if server is not None:
+                    server.close()
+            except Exception as err_2:
+                print('another error happened: {}'.format(err_2))
+
+
+if __name__ == '__main__':
+    main()
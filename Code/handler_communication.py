@@ -1,118 +1,458 @@
-'''
-Created on Jul 15, 2014
-
-@author: smedema
-'''
-
-
-import socket
-import threading
-from time import sleep
-from json import dumps, loads
-import logging
-import errno
-import my_exceptions
-
-BUFSIZE = 4096
-INTERVAL = 0.250
-
-class ClientThread(threading.Thread):
-
-    
-    def __init__(self, host, port, ID, num_players):
-        super(ClientThread, self).__init__()
-        self.socket = socket.create_connection((host,port), None)
-        self.lock = threading.Lock()
-        self.set_values({u'ID': ID})
-        self.set_values({u'num_players': num_players})
-        self.get_stack = []
-
-        self._stop = threading.Event()
-    
-    def run(self):
-        while not self._stop.is_set():
-            sleep(INTERVAL)
-            try:
-                messages = self.socket.recv(BUFSIZE).split('\n')
-            except socket.error as error_:
-                if error_[0] == errno.EWOULDBLOCK:
-                    continue
-                elif error_[0] == errno.WSAECONNRESET:
-                    print('I tried to recv something after connection closed, like the dumb computer I am.')
-                    break
-                else:
-                    raise error_
-            for message in messages:
-                if message == '':
-                    continue  
-#                 print message
-                message_dict = loads(message)
-                self.command(message_dict)
-            
-    def command(self, command_dict):
-        if command_dict[u'request'] == u'get':
-            self.get_stack.append(command_dict)
-        else:
-            logging.debug('{}'.format(command_dict))
-            pass
-    
-    def stop(self):
-        try:
-            with self.lock:
-                self.socket.send('{"category":"handler", "request":"quit"}\n')
-        except socket.error as error_:
-                if error_[0] == errno.WSAECONNRESET:
-                    print('No need to tell the handler to quit if it has already closed the connection.')
-                else:
-                    raise error_
-        finally:
-            self._stop.set()
-    
-    def send_message(self, request, values=None):
-        to_send_dict = {}
-        to_send_dict[u'category'] = u'handler'
-        to_send_dict[u'request'] = request
-        if values is not None:
-            to_send_dict[u'values'] = values
-        to_send_str = dumps(to_send_dict) + '\n'
-#         print to_send_str
-        with self.lock:
-            self.socket.send(to_send_str)
-    
-    def set_values(self, values_dict):
-        self.send_message(u'set', values_dict)
-        
-    def get_value(self, key):
-        self.send_message(u'get', values=[key])
-        reply = None
-        while reply is None:
-            sleep(INTERVAL)
-            for index in range(len(self.get_stack)):
-                for key_, value in self.get_stack[index][u'values'].iteritems():
-                    if key_ == key:
-                        if self.get_stack[index][u'statuscode'] == 200:
-                            reply = value
-                            del self.get_stack[index]
-                        # elif self.get_stack[index][u'statuscode'] == SomeOtherCode:
-                        #     do something appropriate for that code
-                        else:
-                            raise my_exceptions.HandlerException(self.get_stack[index])
-        return reply
-        
-    
-    def append_values(self, values_dict):
-        self.send_message(u'append', values_dict)
-    
-    def set_is_set_up(self, tf):
-        self.set_values({u'is_set_up':tf})
-    
-    def send_contrib(self, contribution):
-        self.append_values({u'contributions':contribution})
-        
-    def report_contribution(self, contribution):
-        self.send_message(u'append', {u'contributions': contribution})
-        
-    
-    
-    
-    
\ No newline at end of file
+'''
+Created on Jul 15, 2014
+
+@author: smedema
+'''
+
+
+import socket
+import threading
+from itertools import count
+from time import sleep, time
+import logging
+import errno
+import my_exceptions
+from framing import LineBuffer, decode, encode
+
+BUFSIZE = 4096
+# How often to look for requests that have timed out.
+TIMEOUT_CHECK_INTERVAL = 0.1
+# How often to try to connect again after losing the handler.
+RECONNECT_INTERVAL = 0.5
+
+class ClientThread(threading.Thread):
+
+    
+    def __init__(self, host, port, ID, num_players, reply_timeout=10.0,
+                 source_address=None, group=None, reconnect_timeout=60.0):
+        super(ClientThread, self).__init__()
+        self._address = (host, port)
+        # The handler tells players apart by IP, so several players on
+        # one machine need a source_address each, e.g. 127.0.0.2.
+        self._source_address = source_address
+        self.socket = self._connect()
+        self.lock = threading.Lock()
+        self.line_buffer = LineBuffer(BUFSIZE)
+        self.reply_timeout = reply_timeout
+        self.reconnect_timeout = reconnect_timeout
+        # Every request gets the next ID, which the handler echoes in
+        # its reply.
+        self._next_id = count(1)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._rounds = {}
+        self._rounds_lock = threading.Lock()
+        # Our copy of the handler's all_contributions, and the version
+        # of the session it is up to date with.
+        self._contributions = {}
+        self._contributions_version = 0
+        self._contributions_lock = threading.Lock()
+        self._identity = [{u'ID': ID}]
+        if group is not None:
+            # Join this group instead of whichever the handler picks.
+            self._identity.append({u'group': group})
+        self._identity.append({u'num_players': num_players})
+
+        # Set once a player has quit, which ends the group; the handler
+        # then turns us away if we connect again.
+        self.group_ended = False
+        self._stop = threading.Event()
+        self._identify(self.socket)
+        self._watchdog = threading.Thread(target=self._expire_pending)
+        self._watchdog.daemon = True
+        self._watchdog.start()
+    
+    def run(self):
+        while not self._stop.is_set():
+            # The socket blocks, so this returns as soon as anything
+            # arrives.
+            try:
+                messages = self.line_buffer.recv_from(self.socket)
+            except socket.error as error_:
+                if error_[0] == errno.EWOULDBLOCK:
+                    continue
+                messages = None
+            if messages is None:
+                # The handler closed the connection or went away.
+                if self._stop.is_set() or not self._reconnect():
+                    break
+                continue
+            for message in messages:
+#                 print message
+                try:
+                    message_dict = decode(message)
+                except ValueError:
+                    logging.exception('Malformed message from the handler.')
+                    continue
+                self.command(message_dict)
+        self.socket.close()
+            
+    def command(self, command_dict):
+        if command_dict.get(u'statuscode') == 410:
+            # Pushed when another player quits, or the reply to our
+            # identifying ourselves after the group ended.
+            self._end_group()
+        if u'id' in command_dict:
+            with self._pending_lock:
+                pending = self._pending.pop(command_dict[u'id'], None)
+            if pending is not None:
+                pending.resolve(command_dict)
+            else:
+                logging.debug('{}'.format(command_dict))
+        elif command_dict.get(u'request') == u'round_complete':
+            values = command_dict[u'values']
+            self.round_complete(values[u'round']).resolve(
+                    values[u'contributions']
+                    )
+        else:
+            logging.debug('{}'.format(command_dict))
+            pass
+    
+    def stop(self):
+        '''Tell the handler we quit, which ends the group, and stop:
+        run() returns instead of connecting again, and so does the
+        thread that times out requests. Waits for both, unless called
+        from run().
+        '''
+        # Stop first, so that run() does not take the handler closing
+        # the connection for a lost one and connect again.
+        stopped = self._stop.is_set()
+        self._stop.set()
+        with self.lock:
+            sock = self.socket
+        if not stopped:
+            try:
+                sock.sendall('{"category":"handler", "request":"quit"}\n')
+            except socket.error as error_:
+                if error_[0] in (errno.ECONNRESET, errno.EPIPE, errno.EBADF):
+                    print('No need to tell the handler to quit if it has already closed the connection.')
+                else:
+                    raise error_
+        try:
+            # Wakes run() up, in case the handler is not there to
+            # close the connection. The quit still goes out first.
+            sock.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        if threading.current_thread() is not self and self.is_alive():
+            self.join()
+        self._watchdog.join()
+    
+    def send_message(self, request, values=None, expect_reply=False):
+        '''Send a request, tagged with a new request ID.
+        
+        With expect_reply, return a PendingReply to wait on. It is
+        registered before the request goes out, so the reply cannot
+        arrive before anybody is waiting for it.
+        
+        Raises a GroupEndedError once the group has ended.
+        '''
+        if self.group_ended:
+            raise my_exceptions.GroupEndedError(
+                    'another player quit, which ended the group'
+                    )
+        request_id = next(self._next_id)
+        to_send_dict = {}
+        to_send_dict[u'category'] = u'handler'
+        to_send_dict[u'request'] = request
+        to_send_dict[u'id'] = request_id
+        if values is not None:
+            to_send_dict[u'values'] = values
+        to_send_str = encode(to_send_dict)
+#         print to_send_str
+        pending = None
+        if expect_reply:
+            pending = PendingReply(self, request_id)
+            with self._pending_lock:
+                self._pending[request_id] = pending
+        # Sent under the lock, so that it is clear which connection
+        # it went out on when run() swaps in a new one.
+        with self.lock:
+            sock = self.socket
+            try:
+                sock.sendall(to_send_str)
+            except socket.error as error_:
+                send_error = error_
+            else:
+                send_error = None
+                if pending is not None:
+                    pending.sock = sock
+        if send_error is not None:
+            # If the handler went away, wait for run() to connect
+            # again and send it there.
+            if not self._wait_for_new_socket(sock):
+                raise send_error
+            with self.lock:
+                self.socket.sendall(to_send_str)
+                if pending is not None:
+                    pending.sock = self.socket
+        return pending
+    
+    def _connect(self):
+        sock = socket.create_connection(self._address, None,
+                                        self._source_address)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+    
+    def _identify(self, sock):
+        '''Tell the handler who we are on {sock}, directly rather
+        than with send_message(): while reconnecting, {sock} is not
+        self.socket yet, and requests from other threads wait until
+        it is, so that they reach the handler after these.
+        '''
+        sock.sendall(b''.join(encode({u'category': u'handler',
+                                      u'request': u'set',
+                                      u'id': next(self._next_id),
+                                      u'values': values})
+                              for values in self._identity))
+    
+    def _reconnect(self):
+        '''Keep trying to connect to the handler again for up to
+        reconnect_timeout seconds, and rejoin our group. The handler
+        gives us our place back, going by our IP and ID.
+        
+        Requests still waiting for a reply fail, as their replies
+        are lost. Returns whether we are connected again.
+        '''
+        with self._pending_lock:
+            lost = self._pending.values()
+            self._pending.clear()
+        for pending in lost:
+            pending.fail('lost the connection to the handler')
+        deadline = time() + self.reconnect_timeout
+        while not self._stop.is_set() and time() < deadline:
+            try:
+                sock = self._connect()
+            except socket.error:
+                self._stop.wait(RECONNECT_INTERVAL)
+                continue
+            try:
+                self._identify(sock)
+            except socket.error:
+                sock.close()
+                continue
+            with self.lock:
+                old_sock, self.socket = self.socket, sock
+            old_sock.close()
+            self.line_buffer.clear()
+            # Requests sent on the old connection since we lost it
+            # will not be answered either.
+            with self._pending_lock:
+                lost = [pending for pending in self._pending.itervalues()
+                        if pending.sock is old_sock]
+                for pending in lost:
+                    del self._pending[pending.request_id]
+            for pending in lost:
+                pending.fail('lost the connection to the handler')
+            logging.warning('Reconnected to the handler.')
+            return True
+        logging.error('Could not reconnect to the handler.')
+        return False
+    
+    def _end_group(self):
+        '''Stop, without connecting again, and fail every request and
+        round still being waited for.
+        '''
+        self.group_ended = True
+        self._stop.set()
+        error = my_exceptions.GroupEndedError(
+                'another player quit, which ended the group'
+                )
+        with self._pending_lock:
+            lost = self._pending.values()
+            self._pending.clear()
+        for pending in lost:
+            pending.fail(error)
+        with self._rounds_lock:
+            rounds = self._rounds.values()
+        for result in rounds:
+            if not result.done():
+                result.fail(error)
+    
+    def _wait_for_new_socket(self, sock):
+        deadline = time() + self.reconnect_timeout
+        while (self.socket is sock and time() < deadline and
+               not self._stop.is_set()):
+            sleep(TIMEOUT_CHECK_INTERVAL)
+        return self.socket is not sock
+    
+    def _expire_pending(self):
+        # Waiting on an Event with a timeout polls in Python 2, which
+        # would add up to a millisecond to every reply. So replies are
+        # waited for without one, and this thread wakes up the ones
+        # that have waited too long.
+        while not self._stop.is_set():
+            sleep(TIMEOUT_CHECK_INTERVAL)
+            now = time()
+            with self._pending_lock:
+                expired = [pending for pending in self._pending.itervalues()
+                           if pending.deadline is not None and
+                              pending.deadline <= now]
+                for pending in expired:
+                    del self._pending[pending.request_id]
+            for pending in expired:
+                pending.expire()
+    
+    def set_values(self, values_dict):
+        self.send_message(u'set', values_dict)
+        
+    def get_value(self, key, timeout=None):
+        '''Return the handler's value for {key}.
+        
+        Raises a HandlerTimeoutError if there is no reply within
+        {timeout} seconds (default self.reply_timeout).
+        '''
+        return self._request(u'get', [key], timeout)[key]
+    
+    def get_all_contributions(self, timeout=None):
+        '''Return the same as get_value(u'all_contributions'), but
+        only have the handler send the contributions made since the
+        last call.
+        '''
+        reply = self._request(
+                u'get_since', {u'version': self._contributions_version},
+                timeout
+                )
+        with self._contributions_lock:
+            for IP, round_number, contribution in reply[u'contributions']:
+                list_ = self._contributions.setdefault(IP, [])
+                if len(list_) < round_number:
+                    list_.extend([None]*(round_number - len(list_)))
+                list_[round_number-1] = contribution
+            self._contributions_version = max(
+                    self._contributions_version, reply[u'version']
+                    )
+            return dict((IP, list(list_))
+                        for IP, list_ in self._contributions.iteritems())
+    
+    def _request(self, request, values, timeout=None):
+        '''Send a request, wait for the reply and return its values.
+        
+        Raises a HandlerException if the handler could not do it, or a
+        HandlerTimeoutError if there is no reply within {timeout}
+        seconds (default self.reply_timeout).
+        '''
+        if timeout is None:
+            timeout = self.reply_timeout
+        pending = self.send_message(request, values, expect_reply=True)
+        reply = pending.wait(timeout)
+        if reply[u'statuscode'] == 200:
+            return reply[u'values']
+        # elif reply[u'statuscode'] == SomeOtherCode:
+        #     do something appropriate for that code
+        else:
+            raise my_exceptions.HandlerException(reply)
+        
+    
+    def round_complete(self, round_number):
+        '''Return the RoundResult of round {round_number}, counting
+        from 1 over all games. The handler pushes it as soon as every
+        player has contributed, whether or not anybody is waiting yet.
+        '''
+        with self._rounds_lock:
+            result = self._rounds.get(round_number)
+            if result is None:
+                result = self._rounds[round_number] = RoundResult(
+                        round_number
+                        )
+        return result
+    
+    def append_values(self, values_dict):
+        self.send_message(u'append', values_dict)
+    
+    def set_is_set_up(self, tf):
+        self.set_values({u'is_set_up':tf})
+    
+    def send_contrib(self, contribution):
+        self.append_values({u'contributions':contribution})
+        
+    def report_contribution(self, contribution):
+        self.send_message(u'append', {u'contributions': contribution})
+
+
+class PendingReply(object):
+    
+    '''A single request waiting on its reply.'''
+    
+    __slots__ = ('client', 'request_id', 'sock', 'reply', 'deadline',
+                 'error', '_done')
+    
+    def __init__(self, client, request_id):
+        self.client = client
+        self.request_id = request_id
+        # The connection the request went out on, once it has.
+        self.sock = None
+        self.reply = None
+        self.deadline = None
+        self.error = None
+        self._done = threading.Event()
+        
+    def resolve(self, reply):
+        self.reply = reply
+        self._done.set()
+        
+    def expire(self):
+        self._done.set()
+        
+    def fail(self, error):
+        self.error = error
+        self._done.set()
+        
+    def wait(self, timeout=None):
+        '''Return the reply, or raise a HandlerTimeoutError if it has
+        not arrived within {timeout} seconds (give or take
+        TIMEOUT_CHECK_INTERVAL).
+        '''
+        if timeout is not None:
+            self.deadline = time() + timeout
+        self._done.wait()
+        if isinstance(self.error, my_exceptions.HandlerException):
+            raise self.error
+        if self.error is not None:
+            raise my_exceptions.HandlerException(self.error)
+        if self.reply is None:
+            raise my_exceptions.HandlerTimeoutError(
+                    'no reply to request {} within {} s'.format(
+                            self.request_id, timeout
+                            ))
+        return self.reply
+
+
+class RoundResult(object):
+    
+    '''The contributions of one round, once every player has made
+    theirs.
+    '''
+    
+    __slots__ = ('round_number', 'contributions', 'error', '_done')
+    
+    def __init__(self, round_number):
+        self.round_number = round_number
+        self.contributions = None
+        self.error = None
+        self._done = threading.Event()
+        
+    def resolve(self, contributions):
+        self.contributions = contributions
+        self._done.set()
+        
+    def fail(self, error):
+        self.error = error
+        self._done.set()
+        
+    def done(self):
+        return self._done.is_set()
+        
+    def wait(self, timeout=None):
+        '''Return the contributions by IP, or raise a
+        HandlerTimeoutError if the round has not been completed within
+        {timeout} seconds, or a GroupEndedError if it never will be.
+        '''
+        if not self._done.wait(timeout):
+            raise my_exceptions.HandlerTimeoutError(
+                    'round {} not complete within {} s'.format(
+                            self.round_number, timeout
+                            ))
+        if self.error is not None:
+            raise self.error
+        return self.contributions
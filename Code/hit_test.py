@@ -0,0 +1,234 @@
+'''
+Finding what is under a point, e.g. the mouse or the gaze, without
+testing every item on the screen.
+'''
+
+from bisect import bisect_right
+from math import floor
+
+
+class GridIndex(object):
+
+    '''Items laid out on a regular grid, like the contribution choices.
+
+    Finds the cell a point is in with a little arithmetic, so the cost
+    of a lookup does not depend on how many cells there are. Positions
+    are in whatever coordinates the centres were given in; the spacing
+    may be negative, e.g. for rows going down the screen in psychopy's
+    coordinates.
+    '''
+
+    def __init__(self, first_centre, spacing, nrows, ncols, num_items=None):
+        '''Initialize the class.
+
+        Keyword arguments:
+        first_centre -- (x, y) of the centre of the first cell
+        spacing -- (x, y) from one cell's centre to the next one's,
+            along a row and down a column
+        nrows, ncols -- the size of the grid
+        num_items -- how many of the cells are used, filled in row by
+            row (default all of them)
+        '''
+        self.first_centre = first_centre
+        self.spacing = spacing
+        self.nrows = nrows
+        self.ncols = ncols
+        if num_items is None:
+            num_items = nrows*ncols
+        self.num_items = num_items
+
+    def centre(self, index):
+        '''(x, y) of the centre of cell {index}.'''
+        row, col = divmod(index, self.ncols)
+        return (self.first_centre[0] + col*self.spacing[0],
+                self.first_centre[1] + row*self.spacing[1])
+
+    def hit(self, pos, radius):
+        '''The index of the cell whose centre is closer than {radius}
+        to {pos}, or None. {radius} should be at most half the spacing,
+        so that only the nearest centre can be that close.
+        '''
+        x0, y0 = self.first_centre
+        dx, dy = self.spacing
+        x, y = pos[0], pos[1]
+        col = _nearest(x, x0, dx)
+        row = _nearest(y, y0, dy)
+        if not (0 <= col < self.ncols and 0 <= row < self.nrows):
+            return None
+        index = row*self.ncols + col
+        if index >= self.num_items:
+            return None
+        x -= x0 + col*dx
+        y -= y0 + row*dy
+        if x*x + y*y < radius*radius:
+            return index
+        return None
+
+
+class TableIndex(object):
+
+    '''Cells of a table whose columns and rows need not be evenly
+    spaced, like the feedback screen's.
+
+    Each cell reaches halfway to its neighbours, as far on its other
+    side, and no further than half the cell size, if one is given,
+    from its centre. The cells' edges are kept sorted, so a lookup is
+    two bisections, and NumPy arrays of points can be looked up all
+    at once.
+    '''
+
+    def __init__(self, col_centres, row_centres, cell_size=None):
+        '''Initialize the class.
+
+        Keyword arguments:
+        col_centres -- x of the centre of each column, in any order
+        row_centres -- y of the centre of each row, in any order
+        cell_size -- (width, height) that the cells are at most
+            (default None, they reach halfway to their neighbours)
+        '''
+        if cell_size is None:
+            cell_size = (None, None)
+        self.ncols = len(col_centres)
+        self.nrows = len(row_centres)
+        self._col_order, self.col_edges = _compile_axis(col_centres,
+                                                        cell_size[0])
+        self._row_order, self.row_edges = _compile_axis(row_centres,
+                                                        cell_size[1])
+
+    def cell(self, pos):
+        '''(column, row) of the cell {pos} is in, as indices into the
+        centres given, or None if it is in none.
+        '''
+        col = bisect_right(self.col_edges, pos[0])
+        row = bisect_right(self.row_edges, pos[1])
+        # Odd: between a cell's start and end, not in a gap.
+        if col & 1 and row & 1:
+            return self._col_order[col >> 1], self._row_order[row >> 1]
+        return None
+
+    def cells(self, xs, ys):
+        '''cell() of every point at {xs}, {ys}, as NumPy arrays of
+        columns and rows, both -1 where a point is in no cell. NaNs are
+        in none.
+        '''
+        # Only analysis code needs NumPy, the screens do not.
+        import numpy
+
+        col = numpy.searchsorted(self.col_edges, xs, side='right')
+        row = numpy.searchsorted(self.row_edges, ys, side='right')
+        in_table = (col & 1).astype(bool) & (row & 1).astype(bool)
+        cols = numpy.empty(col.shape, dtype=int)
+        rows = numpy.empty(row.shape, dtype=int)
+        cols.fill(-1)
+        rows.fill(-1)
+        cols[in_table] = numpy.asarray(self._col_order)[col[in_table] >> 1]
+        rows[in_table] = numpy.asarray(self._row_order)[row[in_table] >> 1]
+        return cols, rows
+
+    def box(self, col, row):
+        '''(min x, min y, max x, max y) of the cell at {col}, {row}.'''
+        col_at = self._col_order.index(col)
+        row_at = self._row_order.index(row)
+        x0, x1 = self.col_edges[2*col_at:2*col_at+2]
+        y0, y1 = self.row_edges[2*row_at:2*row_at+2]
+        return x0, y0, x1, y1
+
+
+class SpatialHash(object):
+
+    '''Items anywhere on the screen, each with a bounding box.
+
+    The screen is cut into square buckets, and every item is filed
+    under the buckets its box overlaps, so a lookup only tests the
+    items in one bucket.
+    '''
+
+    def __init__(self, bucket_size=100):
+        '''Initialize the class.
+
+        Keyword arguments:
+        bucket_size -- the side of a bucket, in the items' units; about
+            the size of an item works well (default 100)
+        '''
+        self.bucket_size = float(bucket_size)
+        self._buckets = {}
+
+    def add(self, item, box, contains=None):
+        '''File {item} under {box}, (min x, min y, max x, max y). The
+        box takes in its min edges but not its max ones, so that boxes
+        side by side do not overlap.
+
+        Keyword arguments:
+        contains -- a function of a point saying whether {item} is
+            really there, for items that are not rectangles, e.g. a
+            psychopy shape's contains (default None, the whole box)
+        '''
+        x0, y0, x1, y1 = box
+        entry = (item, box, contains)
+        for bx in range(self._bucket(x0), self._bucket(x1) + 1):
+            for by in range(self._bucket(y0), self._bucket(y1) + 1):
+                self._buckets.setdefault((bx, by), []).append(entry)
+
+    def clear(self):
+        self._buckets.clear()
+
+    def hits(self, pos):
+        '''All the items at {pos}, in the order they were added.'''
+        x, y = pos
+        if x != x or y != y:
+            # NaN, e.g. a lost gaze sample, is nowhere.
+            return []
+        entries = self._buckets.get((self._bucket(x), self._bucket(y)), ())
+        return [item for item, (x0, y0, x1, y1), contains in entries
+                if x0 <= x < x1 and y0 <= y < y1 and
+                (contains is None or contains(pos))]
+
+    def hit(self, pos):
+        '''The last item added that is at {pos}, i.e. the one drawn on
+        top, or None.
+        '''
+        x, y = pos
+        if x != x or y != y:
+            return None
+        # As _bucket(), inline, as this is called for every sample.
+        size = self.bucket_size
+        entries = self._buckets.get((int(x//size), int(y//size)))
+        if entries:
+            for item, (x0, y0, x1, y1), contains in reversed(entries):
+                if (x0 <= x < x1 and y0 <= y < y1 and
+                    (contains is None or contains(pos))):
+                    return item
+        return None
+
+    def _bucket(self, coordinate):
+        return int(floor(coordinate/self.bucket_size))
+
+
+def _nearest(value, first, spacing):
+    # The number of the grid line nearest {value}.
+    if spacing == 0:
+        return 0
+    return int(floor((value - first)/spacing + 0.5))
+
+
+def _compile_axis(centres, size):
+    # The indices of {centres} in order along the axis, and the edges
+    # of each cell in that order, [start, end, start, end...].
+    order = sorted(range(len(centres)), key=lambda i: centres[i])
+    positions = [float(centres[i]) for i in order]
+    edges = []
+    for i, centre in enumerate(positions):
+        if len(positions) == 1:
+            half_before = half_after = float('inf')
+        elif i == 0:
+            half_before = half_after = (positions[1] - centre)/2
+        elif i == len(positions) - 1:
+            half_before = half_after = (centre - positions[i-1])/2
+        else:
+            half_before = (centre - positions[i-1])/2
+            half_after = (positions[i+1] - centre)/2
+        if size is not None:
+            half_before = min(half_before, size/2.0)
+            half_after = min(half_after, size/2.0)
+        edges.extend((centre - half_before, centre + half_after))
+    return order, edges
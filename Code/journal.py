@@ -0,0 +1,117 @@
+'''
+A write-ahead log of the handler's session state, so that a handler
+that crashed or was restarted can pick up every group where it was.
+'''
+
+import logging
+import os
+import threading
+from time import sleep
+
+from framing import decode, encode
+
+
+class Journal(object):
+
+    '''Appends every change to the session state to a file before the
+    handler makes it.
+
+    Each entry is one line of JSON, written and flushed to the OS
+    straight away, so it survives the handler crashing. An fsync,
+    which it takes to survive the machine crashing too, costs
+    milliseconds, so a thread of its own does that at most every
+    {fsync_interval} seconds, for everything written since.
+    '''
+
+    def __init__(self, file_name, fsync_interval=0.05):
+        '''Initialize the class.
+
+        Keyword arguments:
+        file_name -- the journal to append to. Read it with
+            read_journal() first to pick up where it left off.
+        fsync_interval -- seconds to wait after a write before
+            fsyncing, so that writes close together share one fsync
+            (default 0.05)
+        '''
+        self.file_name = file_name
+        self.fsync_interval = fsync_interval
+        self.entries_written = 0
+        self.fsyncs = 0
+        _trim_torn_tail(file_name)
+        self._file = open(file_name, 'ab')
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sync_loop)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def write(self, entry):
+        '''Append one entry, a JSON-serializable dict.'''
+        self._file.write(encode(entry))
+        self._file.flush()
+        self.entries_written += 1
+        self._dirty.set()
+
+    def close(self):
+        '''fsync whatever is left and close the file.'''
+        if self._file.closed:
+            return
+        self._stop.set()
+        self._dirty.set()
+        self._thread.join()
+        self._sync()
+        self._file.close()
+
+    def _sync_loop(self):
+        while True:
+            self._dirty.wait()
+            if self._stop.is_set():
+                return
+            sleep(self.fsync_interval)
+            # Anything written from here on sets the flag again and
+            # gets an fsync of its own.
+            self._dirty.clear()
+            # close() may have set it just now, and it fsyncs itself.
+            if self._stop.is_set():
+                return
+            self._sync()
+
+    def _sync(self):
+        try:
+            os.fsync(self._file.fileno())
+        except (OSError, ValueError):
+            logging.exception('Could not fsync {}.'.format(self.file_name))
+            return
+        self.fsyncs += 1
+
+
+def read_journal(file_name):
+    '''Return the entries in a journal, oldest first. A last line cut
+    short by a crash is ignored.
+    '''
+    if not os.path.exists(file_name):
+        return []
+    with open(file_name, 'rb') as file_:
+        lines = file_.read().split(b'\n')
+    entries = []
+    for index, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            entries.append(decode(line))
+        except ValueError:
+            if index == len(lines) - 1:
+                break
+            raise
+    return entries
+
+
+def _trim_torn_tail(file_name):
+    # Cut off a line the last writer did not finish, so the next entry
+    # does not get glued onto it.
+    if not os.path.exists(file_name):
+        return
+    with open(file_name, 'r+b') as file_:
+        data = file_.read()
+        if data and not data.endswith(b'\n'):
+            file_.truncate(data.rfind(b'\n') + 1)
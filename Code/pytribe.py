@@ -1,500 +1,1094 @@
-'''
-Created on Jul 28, 2014
-
-@author: smedema
-'''
-
-import threading
-import json
-import socket
-from datetime import datetime
-from copy import deepcopy
-from time import sleep
-from Queue import Queue, LifoQueue
-
-
-class HeartThread(threading.Thread):
-    
-    '''Sends "heartbeats," i.e. keepalives, to the eye tribe server.'''
-    
-    def __init__(self, beat_function, interval=0.250):
-        '''Initialize the class.
-        
-        Keyword arguments:
-        beat_function -- this thread is supposed to be incapable of working
-            on its own without a proper EyeTribeServer object. We don't
-            want to directly give it access to the socket or threading lock
-            for compartmentalization reasons.
-        interval -- the interval in between sending heartbeats
-            (default 0.250 seconds)
-        '''
-        super(HeartThread, self).__init__()
-        self.beat = beat_function
-        self.interval = interval
-        self._stop = threading.Event()
-        
-    def stop(self):
-        '''Set the stop flag.'''
-        self._stop.set()
-        
-    def run(self):
-        '''Keep on beating every {interval}.'''
-        while not self._stop.is_set():
-            self.beat()
-            sleep(self.interval)
-                
-
-class ListenerThread(threading.Thread):
-    
-    '''Continually listens for messages from the eye tribe server,
-    and puts these into a Queue to be processed.
-    '''
-    
-    def __init__(self, recv_function, q):
-        '''Initialize the function.
-        
-        Keyword arguments:
-        recv_function -- this thread is supposed to be incapable of working
-            on its own without a proper EyeTribeServer object. We don't
-            want to directly give it access to the socket or threading lock
-            for compartmentalization reasons.
-        q -- a Queue to put stuff in.
-        '''
-        super(ListenerThread, self).__init__()
-        self.recv_function = recv_function
-        self.q = q
-        self._stop = threading.Event()
-            
-        
-    def stop(self):
-        '''Set the stop flag.'''
-        self._stop.set()
-        
-    def run(self):
-        '''Put anything from the socket into the Queue, separating on
-        newlines.
-        '''
-        while not self._stop.is_set():
-            recv_str = self.recv_function()
-            recv_strs = recv_str.split('\n')
-            for str_ in recv_strs:
-                if str_ == '':
-                    continue
-                else:
-                    self.q.put(str_)
-                    
-                    
-class ProcessorThread(threading.Thread):
-    
-    '''Takes the stuff from the Listener Thread's Queue and figures
-    out what to do with it.
-    '''
-    
-    def __init__(self,
-                 raw_data_stream,
-                 set_current_frame,
-                 calibration_q,
-                 tracker_q,
-                 update_states,
-                 frame_file=None):
-        super(ProcessorThread, self).__init__()
-        
-        self._frame_file = frame_file
-        self.raw_q = raw_data_stream
-        self.set_current_frame = set_current_frame
-        self.calibration_q = calibration_q
-        self.tracker_q = tracker_q
-        self.update_states = update_states
-        
-        self._frame_file_lock = threading.Lock()
-        self._stop = threading.Event()
-        
-    @property
-    def frame_file(self):
-        return self._frame_file
-    @frame_file.setter
-    def frame_file(self, file_):
-        if file_ is not self._frame_file:
-            with self._frame_file_lock:
-                if self._frame_file is not None:
-                    self._frame_file.flush()
-                self._frame_file = file_
-            
-        
-
-    def run(self):
-        while not self._stop.is_set():
-            raw_msg = self.raw_q.get().replace('-1.#IND', '0.0')
-            msg = json.loads(raw_msg)
-            
-            if msg[u'statuscode'] in [800, 801, 802]:
-                threading.Thread(target=self.update_states, args=(msg,)).start()
-                continue
-            
-            if u'values' in msg.keys() and u'frame' in msg[u'values'].keys():
-                self.set_current_frame(msg[u'values'][u'frame'])
-                if self._frame_file is not None:
-                    with self._frame_file_lock:
-                        self._frame_file.write('{}\n'.format(msg))
-                continue
-        
-            if msg[u'category'] == u'tracker':
-                self.tracker_q.put(msg)
-            elif msg[u'category'] == u'calibration':
-                self.calibration_q.put(msg)
-            elif msg[u'category'] == u'heartbeat':
-                # could be used for error checking
-                pass
-            else:
-                # error?
-                pass
-
-    def stop(self):
-        self._stop.set()
-
-
-
-class EyeTribeServer(object):
-
-    '''Contains all the methods and properties necessary to make use
-    of the eye tribe tracker with Python.
-    '''
-    
-    def __init__(self, HOST="localhost", port=6555, BUFSIZE=4096):
-
-        self.socket = socket.create_connection((HOST,port), None)
-        self.lock = threading.Lock()
-        self.raw_q = Queue()
-        self._current_frame = None
-        self.calibration_q = EyeTribeQueue()
-        self.tracker_q = EyeTribeQueue()
-        self._in_push_mode = False
-        self.calibration_state_changed = threading.Condition()
-        self.display_index_changed = threading.Condition()
-        self.tracker_state_changed = threading.Condition()
-        
-        # make and start the heartbeat thread
-        self.heart_thr = HeartThread(
-                beat_function=lambda: self._send_message(u'heartbeat')
-                )
-        self.heart_thr.start()
-        
-        # make and start the processor thread
-        self.processor_thr = ProcessorThread(
-                self.raw_q, self._set_current_frame,
-                self.calibration_q, self.tracker_q,
-                self._update_states
-                )
-        self.processor_thr.start()
-        
-        # make and start the listener thread
-        self.listener_thr = ListenerThread(
-                recv_function=lambda: self.socket.recv(BUFSIZE),
-                q=self.raw_q
-                )
-        self.listener_thr.start()
-    
-    def _update_states(self, msg_dict):
-        if msg_dict[u'statuscode'] == 800:
-            with self.calibration_state_changed:
-                self.calibration_state_changed.notify_all()
-        elif msg_dict[u'statuscode'] == 801:
-            with self.display_index_changed:
-                self.display_index_changed.notify_all()
-        elif msg_dict[u'statuscode'] == 802:
-            with self.tracker_state_changed:
-                self.tracker_state_changed.notify_all()
-        else:
-            print msg_dict
-        
-    def _set_current_frame(self, frame):
-        self._current_frame = frame
-        
-    def _send_message(self, category, request=None, values=None):
-        
-        to_send = {}
-        to_send[u'category'] = category
-        if request is not None: 
-            to_send[u'request'] = request
-        if values is not None:
-            to_send[u'values'] = values
-        to_send = json.dumps(to_send)
-        with self.lock:
-            self.socket.send(to_send)
-            
-    def _send_calib_msg(self, request, values=None):
-        self._send_message(u'calibration', request, values)
-        return self.calibration_q.get_item(request, values)
-    
-    def _send_tracker_msg(self, request, values=None):
-        self._send_message(u'tracker', request, values)
-        return self.tracker_q.get_item(request, values)
-    
-    def _get_value(self, value_):
-        reply = self._send_tracker_msg(u'get', [value_])
-        return reply[u'values'][value_]
-    
-    def _set_value(self, key_, value_):
-        return self._send_tracker_msg(u'set', {key_: value_})
-    
-    def _get_values(self, *args):
-        reply = self._send_tracker_msg(u'get', args)
-        to_return = [None]*len(args)
-        for index, arg in enumerate(args):
-            to_return[index] = reply[u'values'][arg]
-        return to_return
-    
-    def _set_values(self, **kwargs):
-        return self._send_tracker_msg(u'set', kwargs)
-    
-    @property
-    def push(self):
-        return self._in_push_mode
-    @push.setter
-    def push(self, bool_):
-        self._in_push_mode = bool_
-        return self._set_value(u'push', bool_)
-    
-    @property
-    def heartbeatinterval(self):
-        return self._get_value(u'heartbeatinterval')
-    @heartbeatinterval.setter
-    def heartbeatinterval(self, value_):
-        raise ImmutableException('heartbeatinterval')
-    
-    @property
-    def version(self):
-        return self._get_value(u'version')
-    @version.setter
-    def version(self, int_):
-        return self._set_value(u'version', int_)
-    
-    @property
-    def trackerstate(self):
-        return self._get_value(u'trackerstate')
-    @trackerstate.setter
-    def trackerstate(self, value_):
-        raise ImmutableException('trackerstate')
-    
-    @property
-    def framerate(self):
-        return self._get_value(u'framerate')
-    @framerate.setter
-    def framerate(self, value_):
-        raise ImmutableException('framerate')
-    
-    @property
-    def iscalibrated(self):
-        return self._get_value(u'iscalibrated')
-    @iscalibrated.setter
-    def iscalibrated(self, value_):
-        raise ImmutableException('iscalibrated')
-    
-    @property
-    def iscalibrating(self):
-        return self._get_value(u'iscalibrating')
-    @iscalibrating.setter
-    def iscalibrating(self, value_):
-        raise ImmutableException('iscalibrating')
-    
-    @property
-    def calibresult(self):
-        return self._get_value(u'calibresult')
-    @calibresult.setter
-    def calibresult(self, value_):
-        raise ImmutableException('calibresult')
-    
-    @property
-    def frame(self):
-        if not self._in_push_mode:
-            self._current_frame = None
-            self._send_message(u'tracker', u'get', [u'frame'])
-            while self._current_frame is None:
-                continue
-        return self._current_frame
-    @frame.setter
-    def frame(self, value_):
-        raise ImmutableException('frame')
-    
-    @property
-    def screenindex(self):
-        return self._get_value(u'screenindex')
-    @screenindex.setter
-    def screenindex(self, int_):
-        return self._set_value(u'screenindex', int_)
-    
-    @property
-    def screenresw(self):
-        return self._get_value(u'screenresw')
-    @screenresw.setter
-    def screenresw(self, int_):
-        return self._set_value(u'screenresw', int_)
-    
-    @property
-    def screenresh(self):
-        return self._get_value(u'screenresh')
-    @screenresh.setter
-    def screenresh(self, int_):
-        return self._set_value(u'screenresh', int_)
-    
-    @property
-    def screenpsyw(self):
-        return self._get_value(u'screenpsyw')
-    @screenpsyw.setter
-    def screenpsyw(self, float_):
-        return self._set_value(u'screenpsyw', float_)
-    
-    @property
-    def screenpsyh(self):
-        return self._get_value(u'screenpsyh')
-    @screenpsyh.setter
-    def screenpsyh(self, float_):
-        return self._set_value(u'screenpsyh', float_)
-    
-    @property
-    def screenres(self):
-        return self._get_values(u'screenresw', u'screenresh')
-    @screenres.setter
-    def screenres(self, arg1, arg2=None):
-        if type(arg1) == list or type(arg1) == tuple:
-            if len(arg1) == 2:
-                return self._set_values(
-                        screenresw=arg1[0], screenresh=arg1[1]
-                        )
-        elif arg2 is not None:
-            return self._set_values(screenresw=arg1, screenresh=arg2)
-    
-    def get_avg_xy(self):
-        frame_ = self.frame
-        return (frame_[u'avg'][u'x'], frame_[u'avg'][u'y'])
-    
-    def get_pupil_locations(self):
-        frame_ = self.frame
-        lefteye = (frame_[u'lefteye'][u'pcenter'][u'x'],
-                   frame_[u'lefteye'][u'pcenter'][u'y'])
-        riteeye = (frame_[u'righteye'][u'pcenter'][u'x'],
-                   frame_[u'righteye'][u'pcenter'][u'y'])
-        return (lefteye, riteeye)
-    
-    def clear_calibration(self):
-        return self._send_calib_msg(u'clear')
-        
-    def start_calibration(self, num_calib_points):
-        return self._send_calib_msg(u'start', {u'pointcount': num_calib_points})
-            
-    def start_calib_point(self, x, y):
-        return self._send_calib_msg(u'pointstart', {u'x': x, u'y': y})
-            
-    def end_calib_point(self):
-        return self._send_calib_msg(u'pointend')
-    
-    def abort_calibration(self):
-        return self._send_calib_msg(u'abort')
-    
-    def record_data_to(self, file_):
-        '''MUST be an open file object set to 'w' or 'a'
-        or None to not record anything'''
-        self.processor_thr.frame_file = file_
-        
-    def est_cpu_minus_tracker_time(
-            self,
-            num_samples=200,
-            cpu_diff_tolerance=0.001,
-            sample_interval=0.016
-            ):
-        if self.push:
-            # Fail by raising an exception
-            # DON'T just return False. That means something else.
-            # (see below)
-            pass
-        yr_mnth_day_hr = datetime.now().isoformat(' ').split(':')[0]
-        before_times = []
-        tracker_times = []
-        after_times = []
-        for _ in range(num_samples+1):
-            before_times.append(datetime.now().isoformat(' '))
-            tracker_times.append(self.frame[u'timestamp']) 
-            after_times.append(datetime.now().isoformat(' '))
-            sleep(sample_interval)
-        avg_cpu_minus_tracker_time = 0
-        for i in range(num_samples):
-            if tracker_times[i] == tracker_times[i+1]:
-                continue
-            before_ls = str(before_times[i]).split(':')
-            tracker_ls = tracker_times[i].split(':')
-            after_ls = str(after_times[i]).split(':')
-            if (before_ls[0] != yr_mnth_day_hr or
-                tracker_ls[0] != yr_mnth_day_hr or
-                after_ls[0] != yr_mnth_day_hr
-                ):
-                # If this ever happens, it means the hour just advanced
-                # by one. Instead of trying to account for that, it
-                # makes more sense to just assume it will almost never
-                # happen, and if it does, it can't possibly happen
-                # again for another hour, so we return False and the
-                # function that calls THIS function just tries again.
-                return False
-            before = float(before_ls[-2])*60 + float(before_ls[-1])
-            tracker = float(tracker_ls[-2])*60 + float(tracker_ls[-1])
-            after = float(after_ls[-2])*60 + float(after_ls[-1])
-            if after-before > cpu_diff_tolerance:
-                continue
-            avg_cpu_minus_tracker_time += ((before+after)/2 - tracker)
-        avg_cpu_minus_tracker_time /= num_samples
-        return avg_cpu_minus_tracker_time
-
-
-class CalibrationError(Exception):
-    
-    
-    def __init__(self, err_msg):
-        self.err_msg = err_msg
-        
-    def __str__(self):
-        return self.err_msg
-    
-    
-class ImmutableException(Exception):
-    
-    
-    def __init__(self, tried_to_set):
-        self.err_msg = 'You cannot set '\
-        '{}, it is defined by TheEyeTribe server.'.format(tried_to_set)
-        
-    def __str__(self):
-        return self.err_msg
-    
-    
-class EyeTribeQueue(LifoQueue):
-    
-    '''A special Queue that only allows get_item() and not get(),
-    so that you can get an item with a specific attribute from the
-    Queue.
-    
-    Inherits from LifoQueue because that uses a basic list as its
-    underlying data structure, enabling easy search. The reason we
-    inherit from a Queue at all is because this needs to be
-    thread-safe, and Queues already have most of that machinery in
-    place.
-    '''    
-    
-    def get(self, block=True, timeout=None):
-        # fail horribly
-        raise Exception('You cannot use the normal "get" function in '
-                        'an EyeTribeQueue.')
-            
-    def get_item(self, request, values=None):
-        self.not_empty.acquire()
-        try:
-            while True: 
-                for i in range(self._qsize()):
-                    if self.queue[i][u'request'] == request:
-                        if request == u'get' and set(self.queue[i][u'values']) != set(values):
-                            continue
-                        item = deepcopy(self.queue[i])
-                        del self.queue[i]
-                        self.not_full.notify()
-                        return item
-                self.not_empty.wait()
-        finally:
-            self.not_empty.release()
+'''
+Created on Jul 28, 2014
+
+@author: smedema
+'''
+
+import threading
+import json
+import logging
+import select
+import socket
+from collections import deque
+from itertools import count
+from time import sleep, time
+from Queue import Empty, Full, Queue
+
+from clock_sync import ClockSync
+from frames import FrameDecoder, FrameSnapshot, decode_message
+from framing import LineBuffer
+from recorders import TextFrameRecorder, RecorderThread
+
+
+# The kinds of state change the eye tribe server notifies us of, by
+# statuscode.
+STATE_CHANGES = {800: u'calibration', 801: u'display', 802: u'tracker'}
+
+
+class HeartThread(threading.Thread):
+    
+    '''Sends "heartbeats," i.e. keepalives, to the eye tribe server.'''
+    
+    def __init__(self, beat_function, interval=0.250):
+        '''Initialize the class.
+        
+        Keyword arguments:
+        beat_function -- this thread is supposed to be incapable of working
+            on its own without a proper EyeTribeServer object. We don't
+            want to directly give it access to the socket or threading lock
+            for compartmentalization reasons.
+        interval -- the interval in between sending heartbeats
+            (default 0.250 seconds)
+        '''
+        super(HeartThread, self).__init__()
+        self.beat = beat_function
+        self.interval = interval
+        self._stop = threading.Event()
+        
+    def stop(self):
+        '''Set the stop flag.'''
+        self._stop.set()
+        
+    def run(self):
+        '''Keep on beating every {interval}.'''
+        while not self._stop.is_set():
+            try:
+                self.beat()
+            except (socket.error, TrackerClosedError):
+                # The listener sees the connection close and deals with it.
+                break
+            sleep(self.interval)
+                
+
+class ListenerThread(threading.Thread):
+    
+    '''Continually listens for messages from the eye tribe server,
+    and puts these into a Queue to be processed.
+    '''
+    
+    def __init__(self, recv_function, q, on_close=None):
+        '''Initialize the function.
+        
+        Keyword arguments:
+        recv_function -- this thread is supposed to be incapable of working
+            on its own without a proper EyeTribeServer object. We don't
+            want to directly give it access to the socket or threading lock
+            for compartmentalization reasons. Must return a list of
+            complete messages, or None once the connection is closed;
+            a socket.error is taken as the connection closing too.
+        q -- a Queue to put stuff in.
+        on_close -- called once the connection has closed (default None)
+        '''
+        super(ListenerThread, self).__init__()
+        self.recv_function = recv_function
+        self.q = q
+        self.on_close = on_close
+        self._stop = threading.Event()
+            
+        
+    def stop(self):
+        '''Set the stop flag.'''
+        self._stop.set()
+        
+    def run(self):
+        '''Put every complete message from the socket into the Queue.'''
+        while not self._stop.is_set():
+            try:
+                messages = self.recv_function()
+            except socket.error:
+                # e.g. reset by the server; closed all the same.
+                messages = None
+            if messages is None:
+                if self.on_close is not None:
+                    self.on_close()
+                break
+            for message in messages:
+                self.q.put(message)
+                    
+                    
+class MessageProcessor(object):
+    
+    '''Takes complete messages from the eye tribe server and figures
+    out what to do with them.
+    '''
+    
+    def __init__(self,
+                 set_current_frame,
+                 calibration_q,
+                 tracker_q,
+                 update_states,
+                 recorder=None):
+        self._recorder = recorder
+        self.set_current_frame = set_current_frame
+        self.calibration_q = calibration_q
+        self.tracker_q = tracker_q
+        self.update_states = update_states
+        self.frame_decoder = FrameDecoder()
+        
+        self._recorder_lock = threading.Lock()
+        
+    @property
+    def recorder(self):
+        return self._recorder
+    @recorder.setter
+    def recorder(self, recorder_):
+        with self._recorder_lock:
+            self._recorder = recorder_
+            
+    def process(self, raw_msg):
+        # Frames come 30 or 60 times a second, so only what the
+        # snapshot needs is pulled out of them. The rest is decoded if
+        # and when somebody wants it.
+        values = self.frame_decoder.decode(raw_msg)
+        if values is not None:
+            self._new_frame(raw_msg, values)
+            return
+        
+        msg = decode_message(raw_msg)
+        if msg[u'statuscode'] in STATE_CHANGES:
+            # Handed to the StateDispatcher, which delivers them in
+            # order on its own thread.
+            self.update_states(msg)
+            return
+        
+        if u'values' in msg.keys() and u'frame' in msg[u'values'].keys():
+            # A frame the decoder could not read
+            frame = msg[u'values'][u'frame']
+            values = []
+            for path in self.frame_decoder.fields:
+                value = frame
+                for key in path:
+                    value = value[key]
+                values.append(value)
+            self._new_frame(raw_msg, values)
+            return
+    
+        if msg[u'category'] == u'tracker':
+            self.tracker_q.put(msg)
+        elif msg[u'category'] == u'calibration':
+            self.calibration_q.put(msg)
+        elif msg[u'category'] == u'heartbeat':
+            # could be used for error checking
+            pass
+        else:
+            # error?
+            pass
+    
+    def _new_frame(self, raw_msg, values):
+        snapshot = self.set_current_frame(raw_msg, values)
+        # The recorder may be swapped or set to None at any time, so
+        # read it once, under the lock. record() only buffers, so it
+        # is called under the lock as well: once record_data_to() has
+        # swapped a recorder out, no more frames go to it.
+        with self._recorder_lock:
+            recorder = self._recorder
+            if recorder is not None:
+                # The RecorderThread decodes it in full, off this
+                # thread.
+                recorder.record(snapshot)
+                    
+                    
+class ProcessorThread(MessageProcessor, threading.Thread):
+    
+    '''Takes the stuff from the Listener Thread's Queue and figures
+    out what to do with it.
+    '''
+    
+    def __init__(self,
+                 raw_data_stream,
+                 set_current_frame,
+                 calibration_q,
+                 tracker_q,
+                 update_states,
+                 recorder=None):
+        threading.Thread.__init__(self)
+        MessageProcessor.__init__(
+                self, set_current_frame, calibration_q, tracker_q,
+                update_states, recorder
+                )
+        self.raw_q = raw_data_stream
+        self._stop = threading.Event()
+
+    def run(self):
+        while not self._stop.is_set():
+            raw_msg = self.raw_q.get()
+            try:
+                self.process(raw_msg)
+            except Exception:
+                # One bad message, or a recorder that fails, must not
+                # stop the frames coming in.
+                logging.exception('Could not process {}'.format(raw_msg))
+
+    def stop(self):
+        self._stop.set()
+
+
+class StateDispatcher(threading.Thread):
+    
+    '''Delivers the eye tribe server's state change notifications to
+    whoever subscribed to them, one at a time and in the order they
+    arrived, from a single long-lived thread. Notifications given to
+    deliver() instead of put() are delivered there and then, on the
+    caller's thread, e.g. a TrackerReactor's, without starting this
+    one.
+    
+    The kinds of state change are the values of STATE_CHANGES:
+    u'calibration', u'display' and u'tracker'.
+    '''
+    
+    def __init__(self):
+        super(StateDispatcher, self).__init__()
+        # Never keeps the program alive on its own.
+        self.daemon = True
+        self._q = Queue()
+        self._lock = threading.Lock()
+        self._subscribers = dict((kind, ())
+                                 for kind in STATE_CHANGES.itervalues())
+        self._changed = threading.Condition()
+        # How many of each kind (and under None, of any kind) have
+        # been delivered, and the last one.
+        self._counts = dict.fromkeys(self._subscribers.keys() + [None], 0)
+        self._last = {}
+        self._stop = threading.Event()
+        
+    def put(self, msg):
+        '''Queue a notification to be delivered. Never blocks, so
+        the thread reading from the server can carry on at once.
+        '''
+        self._q.put(msg)
+        
+    def subscribe(self, kind, callback):
+        '''Call {callback} with every notification of {kind} from now
+        on. Callbacks are called on the dispatcher's thread (or the
+        one calling deliver()), so they should return quickly;
+        exceptions they raise are logged.
+        '''
+        with self._lock:
+            # A new tuple every time, so run() can go through the old
+            # one without the lock.
+            self._subscribers[kind] = self._subscribers[kind] + (callback,)
+            
+    def unsubscribe(self, kind, callback):
+        '''Stop calling {callback} for notifications of {kind}.'''
+        with self._lock:
+            subscribers = list(self._subscribers[kind])
+            subscribers.remove(callback)
+            self._subscribers[kind] = tuple(subscribers)
+            
+    def wait_for_change(self, kind=None, timeout=None):
+        '''Block until the next notification of {kind} (default None,
+        i.e. any kind) has been delivered and return it.
+        
+        Raises a TrackerTimeoutError if there is none within {timeout}
+        seconds (default None, i.e. wait for ever).
+        '''
+        if timeout is not None:
+            deadline = time() + timeout
+        with self._changed:
+            seen = self._counts[kind]
+            while self._counts[kind] == seen:
+                if timeout is None:
+                    self._changed.wait()
+                    continue
+                remaining = deadline - time()
+                if remaining <= 0:
+                    raise TrackerTimeoutError(
+                            '{} state change'.format(kind or 'a'),
+                            'none within {} s'.format(timeout)
+                            )
+                self._changed.wait(remaining)
+            return self._last[kind]
+        
+    def stop(self):
+        self._stop.set()
+        self._q.put(None)
+        
+    def deliver(self, msg):
+        '''Deliver a notification now, on this thread.'''
+        kind = STATE_CHANGES[msg[u'statuscode']]
+        with self._changed:
+            for key in (kind, None):
+                self._counts[key] += 1
+                self._last[key] = msg
+            self._changed.notify_all()
+        for callback in self._subscribers[kind]:
+            try:
+                callback(msg)
+            except Exception:
+                logging.exception(
+                        'Error in a {} state change callback.'.format(kind)
+                        )
+        
+    def run(self):
+        while not self._stop.is_set():
+            msg = self._q.get()
+            if msg is not None:
+                self.deliver(msg)
+
+
+class TrackerReactor(threading.Thread):
+    
+    '''Drives any number of eye tribe server connections from a
+    single thread.
+    
+    Each EyeTribeServer normally runs its own heartbeat, listener and
+    processor threads. An EyeTribeServer given a TrackerReactor
+    instead registers its socket here, and this one thread reads from
+    every registered socket as data arrives, processes the messages,
+    delivers the state change notifications and sends the
+    heartbeats. Requests are still made from the caller's thread,
+    exactly as before.
+    '''
+    
+    def __init__(self, interval=0.250):
+        '''Initialize the class.
+        
+        Keyword arguments:
+        interval -- the interval in between sending heartbeats. Sockets
+            registered while the reactor is running are picked up
+            within this long. (default 0.250 seconds)
+        '''
+        super(TrackerReactor, self).__init__()
+        self.interval = interval
+        self._connections = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        
+    def register(self, sock, line_buffer, handle_message, beat_function,
+                 on_close=None):
+        '''Start serving a connection.
+        
+        Keyword arguments:
+        sock -- a connected socket to the eye tribe server
+        line_buffer -- the LineBuffer to reassemble its messages with
+        handle_message -- called with every complete message
+        beat_function -- sends one heartbeat
+        on_close -- called once the server has closed the connection
+            (default None)
+        '''
+        with self._lock:
+            self._connections[sock] = [
+                    line_buffer, handle_message, beat_function, 0, on_close
+                    ]
+            
+    def unregister(self, sock):
+        with self._lock:
+            self._connections.pop(sock, None)
+        
+    def stop(self):
+        '''Set the stop flag.'''
+        self._stop.set()
+        
+    def run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                connections = self._connections.items()
+            self._beat(connections)
+            if not connections:
+                sleep(self.interval)
+                continue
+            readable, _, _ = select.select(
+                    [sock for sock, _ in connections], [], [], self.interval
+                    )
+            for sock in readable:
+                self._read(sock)
+                
+    def _beat(self, connections):
+        now = time()
+        for sock, connection in connections:
+            if now >= connection[3]:
+                try:
+                    connection[2]()
+                except (socket.error, TrackerClosedError):
+                    # Only this connection has gone; the others carry on.
+                    self._closed(sock, connection)
+                    continue
+                connection[3] = now + self.interval
+    
+    def _read(self, sock):
+        with self._lock:
+            connection = self._connections.get(sock)
+        if connection is None:
+            return
+        line_buffer, handle_message = connection[0], connection[1]
+        try:
+            messages = line_buffer.recv_from(sock)
+        except socket.error:
+            messages = None
+        if messages is None:
+            self._closed(sock, connection)
+            return
+        for message in messages:
+            try:
+                handle_message(message)
+            except Exception:
+                # One misbehaving tracker must not take the others down.
+                logging.exception('Could not process {}'.format(message))
+    
+    def _closed(self, sock, connection):
+        # Stop serving {sock} and let its owner know, once.
+        with self._lock:
+            if self._connections.pop(sock, None) is None:
+                return
+        logging.warning('Eye tribe server closed the connection.')
+        on_close = connection[4]
+        if on_close is not None:
+            try:
+                on_close()
+            except Exception:
+                logging.exception('Error in an on_close callback.')
+
+
+
+class EyeTribeServer(object):
+
+    '''Contains all the methods and properties necessary to make use
+    of the eye tribe tracker with Python.
+    
+    Pass a running TrackerReactor as {reactor} to serve this
+    connection from the reactor's thread instead of starting four
+    threads of its own. State change callbacks are then called on
+    the reactor's thread.
+    
+    Once the eye tribe server closes the connection, requests waiting
+    for a reply, and any made after, raise a TrackerClosedError.
+    '''
+    
+    def __init__(self, HOST="localhost", port=6555, BUFSIZE=4096,
+                 frame_timeout=1.0, reply_timeout=10.0, reactor=None):
+
+        self.socket = socket.create_connection((HOST,port), None)
+        self.lock = threading.Lock()
+        self.line_buffer = LineBuffer(BUFSIZE)
+        self.raw_q = Queue()
+        self._snapshot = None
+        self._frame_number = 0
+        self.frame_timeout = frame_timeout
+        self.reply_timeout = reply_timeout
+        self.new_frame = threading.Condition()
+        # A Queue per iter_frames() in progress, replaced rather than
+        # changed, so the thread receiving frames can go through it
+        # without a lock.
+        self._frame_queues = ()
+        self.clock_sync = ClockSync()
+        self.calibration_q = PendingReplies()
+        self.tracker_q = PendingReplies()
+        self._closed_error = None
+        self._in_push_mode = False
+        self.calibration_state_changed = threading.Condition()
+        self.display_index_changed = threading.Condition()
+        self.tracker_state_changed = threading.Condition()
+        self.state_dispatcher = StateDispatcher()
+        for kind in STATE_CHANGES.itervalues():
+            self.state_dispatcher.subscribe(kind, self._update_states)
+        self.reactor = reactor
+        
+        if reactor is not None:
+            # The reactor delivers the notifications itself, rather
+            # than every server on it having a dispatcher thread.
+            self.processor = MessageProcessor(
+                    self._set_current_frame,
+                    self.calibration_q, self.tracker_q,
+                    self.state_dispatcher.deliver
+                    )
+            reactor.register(
+                    self.socket, self.line_buffer, self.processor.process,
+                    beat_function=lambda: self._send_message(u'heartbeat'),
+                    on_close=self._connection_closed
+                    )
+            return
+        
+        self.state_dispatcher.start()
+        
+        # make and start the heartbeat thread
+        self.heart_thr = HeartThread(
+                beat_function=lambda: self._send_message(u'heartbeat')
+                )
+        self.heart_thr.start()
+        
+        # make and start the processor thread
+        self.processor_thr = ProcessorThread(
+                self.raw_q, self._set_current_frame,
+                self.calibration_q, self.tracker_q,
+                self.state_dispatcher.put
+                )
+        self.processor = self.processor_thr
+        self.processor_thr.start()
+        
+        # make and start the listener thread
+        self.listener_thr = ListenerThread(
+                recv_function=lambda: self.line_buffer.recv_from(self.socket),
+                q=self.raw_q,
+                on_close=self._connection_closed
+                )
+        self.listener_thr.start()
+    
+    def _update_states(self, msg_dict):
+        if msg_dict[u'statuscode'] == 800:
+            with self.calibration_state_changed:
+                self.calibration_state_changed.notify_all()
+        elif msg_dict[u'statuscode'] == 801:
+            with self.display_index_changed:
+                self.display_index_changed.notify_all()
+        elif msg_dict[u'statuscode'] == 802:
+            with self.tracker_state_changed:
+                self.tracker_state_changed.notify_all()
+        else:
+            print msg_dict
+    
+    def _connection_closed(self):
+        # No replies are coming, so don't leave anybody waiting for
+        # them until they time out.
+        error = TrackerClosedError(
+                'the eye tribe server closed the connection'
+                )
+        self._closed_error = error
+        self.calibration_q.close(error)
+        self.tracker_q.close(error)
+        if self.reactor is None:
+            self.heart_thr.stop()
+    
+    def subscribe(self, kind, callback):
+        '''Call {callback} with every state change notification of
+        {kind}: u'calibration', u'display' or u'tracker'. See
+        StateDispatcher.subscribe().
+        '''
+        self.state_dispatcher.subscribe(kind, callback)
+        
+    def unsubscribe(self, kind, callback):
+        self.state_dispatcher.unsubscribe(kind, callback)
+        
+    def wait_for_state_change(self, kind=None, timeout=None):
+        '''Block until the next state change notification of {kind}
+        (default None, i.e. any kind) and return it.
+        
+        Keyword arguments:
+        kind -- u'calibration', u'display', u'tracker' or None
+        timeout -- seconds to wait before raising a TrackerTimeoutError
+            (default None, i.e. self.reply_timeout)
+        '''
+        if timeout is None:
+            timeout = self.reply_timeout
+        return self.state_dispatcher.wait_for_change(kind, timeout)
+        
+    def _set_current_frame(self, raw_msg, values):
+        # {values} are those of frames.SNAPSHOT_FIELDS, time first.
+        # Stamp every frame with the host time it corresponds to.
+        self.clock_sync.add(values[0])
+        host_time = self.clock_sync.to_host(values[0])
+        # Only this thread ever changes the frame number.
+        snapshot = FrameSnapshot.from_values(
+                values, self._frame_number + 1, host_time, raw_msg
+                )
+        with self.new_frame:
+            self._snapshot = snapshot
+            self._frame_number += 1
+            self.new_frame.notify_all()
+        for q in self._frame_queues:
+            try:
+                q.put_nowait(snapshot)
+            except Full:
+                # Make room by dropping the oldest. Only this thread
+                # puts, so there is room afterwards.
+                try:
+                    q.get_nowait()
+                except Empty:
+                    pass
+                q.put_nowait(snapshot)
+        return snapshot
+    
+    def wait_for_frame(self, newer_than=None, timeout=None):
+        '''Block until a frame newer than frame number {newer_than}
+        arrives and return (frame_number, frame).
+        
+        Keyword arguments:
+        newer_than -- the frame number the caller already has
+            (default None, i.e. whatever frame is current)
+        timeout -- seconds to wait before raising a TrackerTimeoutError
+            (default None, i.e. self.frame_timeout)
+        '''
+        snapshot = self._wait_for_snapshot(newer_than, timeout)
+        return (snapshot.frame_number, snapshot.frame)
+    
+    def _wait_for_snapshot(self, newer_than=None, timeout=None):
+        if timeout is None:
+            timeout = self.frame_timeout
+        deadline = time() + timeout
+        with self.new_frame:
+            if newer_than is None:
+                newer_than = self._frame_number
+            while self._frame_number <= newer_than:
+                remaining = deadline - time()
+                if remaining <= 0:
+                    raise TrackerTimeoutError(
+                            'frame', 'no frame within {} s'.format(timeout)
+                            )
+                self.new_frame.wait(remaining)
+            return self._snapshot
+    
+    def _request_frame(self):
+        # Pull mode: ask for a frame and return its snapshot.
+        with self.new_frame:
+            last_frame_number = self._frame_number
+        self._send_message(u'tracker', u'get', [u'frame'])
+        return self._wait_for_snapshot(last_frame_number)
+    
+    def iter_frames(self, timeout=None, max_buffered=60):
+        '''Yield every frame that arrives from the first next() on,
+        in order, as a dict. Meant for push mode.
+        
+        Each iterator has a queue of its own, so frames that arrive
+        while the caller is busy are kept for it, up to {max_buffered}
+        (default one second at 60 Hz); past that, the oldest are
+        dropped. Use wait_for_frame() to only ever get the latest.
+        
+        Raises a TrackerTimeoutError if no frame arrives for {timeout}
+        seconds (default None, i.e. self.frame_timeout).
+        '''
+        if timeout is None:
+            timeout = self.frame_timeout
+        q = Queue(max_buffered)
+        with self.new_frame:
+            self._frame_queues = self._frame_queues + (q,)
+        try:
+            while True:
+                try:
+                    snapshot = q.get(timeout=timeout)
+                except Empty:
+                    raise TrackerTimeoutError(
+                            'frame', 'no frame within {} s'.format(timeout)
+                            )
+                yield snapshot.frame
+        finally:
+            with self.new_frame:
+                queues = list(self._frame_queues)
+                queues.remove(q)
+                self._frame_queues = tuple(queues)
+        
+    def _send_message(self, category, request=None, values=None):
+        
+        to_send = {}
+        to_send[u'category'] = category
+        if request is not None: 
+            to_send[u'request'] = request
+        if values is not None:
+            to_send[u'values'] = values
+        to_send = json.dumps(to_send)
+        if self._closed_error is not None:
+            raise self._closed_error
+        with self.lock:
+            self.socket.send(to_send)
+            
+    def _send_calib_msg(self, request, values=None):
+        pending = self.calibration_q.expect(request, values)
+        self._send_message(u'calibration', request, values)
+        return pending.wait(self.reply_timeout)
+    
+    def _send_tracker_msg(self, request, values=None):
+        pending = self.tracker_q.expect(request, values)
+        self._send_message(u'tracker', request, values)
+        return pending.wait(self.reply_timeout)
+    
+    def _get_value(self, value_):
+        reply = self._send_tracker_msg(u'get', [value_])
+        return reply[u'values'][value_]
+    
+    def _set_value(self, key_, value_):
+        return self._send_tracker_msg(u'set', {key_: value_})
+    
+    def _get_values(self, *args):
+        reply = self._send_tracker_msg(u'get', args)
+        to_return = [None]*len(args)
+        for index, arg in enumerate(args):
+            to_return[index] = reply[u'values'][arg]
+        return to_return
+    
+    def _set_values(self, **kwargs):
+        return self._send_tracker_msg(u'set', kwargs)
+    
+    @property
+    def push(self):
+        return self._in_push_mode
+    @push.setter
+    def push(self, bool_):
+        self._in_push_mode = bool_
+        return self._set_value(u'push', bool_)
+    
+    @property
+    def heartbeatinterval(self):
+        return self._get_value(u'heartbeatinterval')
+    @heartbeatinterval.setter
+    def heartbeatinterval(self, value_):
+        raise ImmutableException('heartbeatinterval')
+    
+    @property
+    def version(self):
+        return self._get_value(u'version')
+    @version.setter
+    def version(self, int_):
+        return self._set_value(u'version', int_)
+    
+    @property
+    def trackerstate(self):
+        return self._get_value(u'trackerstate')
+    @trackerstate.setter
+    def trackerstate(self, value_):
+        raise ImmutableException('trackerstate')
+    
+    @property
+    def framerate(self):
+        return self._get_value(u'framerate')
+    @framerate.setter
+    def framerate(self, value_):
+        raise ImmutableException('framerate')
+    
+    @property
+    def iscalibrated(self):
+        return self._get_value(u'iscalibrated')
+    @iscalibrated.setter
+    def iscalibrated(self, value_):
+        raise ImmutableException('iscalibrated')
+    
+    @property
+    def iscalibrating(self):
+        return self._get_value(u'iscalibrating')
+    @iscalibrating.setter
+    def iscalibrating(self, value_):
+        raise ImmutableException('iscalibrating')
+    
+    @property
+    def calibresult(self):
+        return self._get_value(u'calibresult')
+    @calibresult.setter
+    def calibresult(self, value_):
+        raise ImmutableException('calibresult')
+    
+    @property
+    def frame(self):
+        '''The current frame as a dict, decoded in full when asked for.
+        Use snapshot where that has everything needed.
+        '''
+        if not self._in_push_mode:
+            return self._request_frame().frame
+        snapshot = self._snapshot
+        return None if snapshot is None else snapshot.frame
+    @frame.setter
+    def frame(self, value_):
+        raise ImmutableException('frame')
+    
+    @property
+    def snapshot(self):
+        '''The current frame as a FrameSnapshot. Cheap enough to read on
+        every display frame in push mode; requests a frame in pull mode.
+        '''
+        if not self._in_push_mode:
+            return self._request_frame()
+        return self._snapshot
+    @snapshot.setter
+    def snapshot(self, value_):
+        raise ImmutableException('snapshot')
+    
+    @property
+    def frame_number(self):
+        '''Sequence number of the current frame, counting from 1.'''
+        return self._frame_number
+    @frame_number.setter
+    def frame_number(self, value_):
+        raise ImmutableException('frame_number')
+    
+    @property
+    def screenindex(self):
+        return self._get_value(u'screenindex')
+    @screenindex.setter
+    def screenindex(self, int_):
+        return self._set_value(u'screenindex', int_)
+    
+    @property
+    def screenresw(self):
+        return self._get_value(u'screenresw')
+    @screenresw.setter
+    def screenresw(self, int_):
+        return self._set_value(u'screenresw', int_)
+    
+    @property
+    def screenresh(self):
+        return self._get_value(u'screenresh')
+    @screenresh.setter
+    def screenresh(self, int_):
+        return self._set_value(u'screenresh', int_)
+    
+    @property
+    def screenpsyw(self):
+        return self._get_value(u'screenpsyw')
+    @screenpsyw.setter
+    def screenpsyw(self, float_):
+        return self._set_value(u'screenpsyw', float_)
+    
+    @property
+    def screenpsyh(self):
+        return self._get_value(u'screenpsyh')
+    @screenpsyh.setter
+    def screenpsyh(self, float_):
+        return self._set_value(u'screenpsyh', float_)
+    
+    @property
+    def screenres(self):
+        return self._get_values(u'screenresw', u'screenresh')
+    @screenres.setter
+    def screenres(self, arg1, arg2=None):
+        if type(arg1) == list or type(arg1) == tuple:
+            if len(arg1) == 2:
+                return self._set_values(
+                        screenresw=arg1[0], screenresh=arg1[1]
+                        )
+        elif arg2 is not None:
+            return self._set_values(screenresw=arg1, screenresh=arg2)
+    
+    def get_avg_xy(self):
+        return self.snapshot.avg_xy
+    
+    def get_pupil_locations(self):
+        return self.snapshot.pupil_locations
+    
+    def clear_calibration(self):
+        return self._send_calib_msg(u'clear')
+        
+    def start_calibration(self, num_calib_points):
+        return self._send_calib_msg(u'start', {u'pointcount': num_calib_points})
+            
+    def start_calib_point(self, x, y):
+        return self._send_calib_msg(u'pointstart', {u'x': x, u'y': y})
+            
+    def end_calib_point(self):
+        return self._send_calib_msg(u'pointend')
+    
+    def abort_calibration(self):
+        return self._send_calib_msg(u'abort')
+    
+    def record_data_to(self, file_):
+        '''MUST be an open file object set to 'w' or 'a',
+        a recorder from the recorders module,
+        or None to not record anything.
+        
+        Frames are written out on a RecorderThread. Everything buffered
+        for the previous file has been written by the time this
+        returns, so it is safe to close that file afterwards.'''
+        writer = None
+        if file_ is not None:
+            if not hasattr(file_, 'record'):
+                file_ = TextFrameRecorder(file_)
+            writer = RecorderThread(file_)
+            writer.start()
+        old_writer = self.processor.recorder
+        self.processor.recorder = writer
+        if old_writer is not None:
+            old_writer.stop()
+            old_writer.join()
+        
+    def est_cpu_minus_tracker_time(self, timeout=5.0, sample_interval=0.016):
+        '''Return host wall clock time minus tracker time, in seconds,
+        where tracker time is the frames' "time" field (ms) / 1000.
+        CPU time = tracker time + this value.
+        
+        The estimate comes from self.clock_sync, which learns from every
+        frame as it arrives. In pull mode frames are requested here,
+        every {sample_interval} seconds, until it has seen enough.
+        '''
+        deadline = time() + timeout
+        while not self.clock_sync.ready.is_set():
+            if time() > deadline:
+                raise TrackerTimeoutError(
+                        'clock sync', 'too few frames in {} s'.format(timeout)
+                        )
+            if self._in_push_mode:
+                self.clock_sync.ready.wait(sample_interval)
+            else:
+                self._request_frame()
+                sleep(sample_interval)
+        wall_minus_clock = time() - self.clock_sync.clock()
+        return self.clock_sync.offset + wall_minus_clock
+
+
+class CalibrationError(Exception):
+    
+    
+    def __init__(self, err_msg):
+        self.err_msg = err_msg
+        
+    def __str__(self):
+        return self.err_msg
+    
+    
+class ImmutableException(Exception):
+    
+    
+    def __init__(self, tried_to_set):
+        self.err_msg = 'You cannot set '\
+        '{}, it is defined by TheEyeTribe server.'.format(tried_to_set)
+        
+    def __str__(self):
+        return self.err_msg
+    
+    
+class TrackerTimeoutError(Exception):
+    
+    
+    def __init__(self, waiting_for, err_msg):
+        self.waiting_for = waiting_for
+        self.err_msg = 'Timed out waiting for {}: {}'.format(
+                waiting_for, err_msg
+                )
+        
+    def __str__(self):
+        return self.err_msg
+    
+    
+class TrackerClosedError(Exception):
+    
+    
+    def __init__(self, err_msg):
+        self.err_msg = err_msg
+        
+    def __str__(self):
+        return self.err_msg
+    
+    
+class PendingReplies(object):
+    
+    '''Matches replies from the eye tribe server to the requests
+    waiting on them.
+    
+    Call expect() BEFORE sending a request, so that the reply cannot
+    arrive before anybody is waiting for it, then wait() on what it
+    returns. Waiters are kept per (request, set of values) key, so a
+    reply only ever wakes up the one thread it belongs to, and the
+    reply dict is handed over as is instead of being copied.
+    '''
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = {}
+        self._next_seq = count()
+        # Set by close(); every request fails with it from then on.
+        self._error = None
+        
+    @staticmethod
+    def key(request, values=None):
+        '''The key a request and its reply are matched on. Only "get"
+        requests are told apart by their values; the server answers
+        every other request type in order.
+        '''
+        if request == u'get' and values is not None:
+            return (request, frozenset(values))
+        return (request, None)
+        
+    def expect(self, request, values=None):
+        '''Register interest in the reply to a request that is about
+        to be sent and return a PendingReply to wait on.
+        '''
+        key = self.key(request, values)
+        pending = PendingReply(self, key, next(self._next_seq))
+        with self._lock:
+            if self._error is None:
+                self._waiters.setdefault(key, deque()).append(pending)
+                return pending
+        pending.fail(self._error)
+        return pending
+    
+    def close(self, error):
+        '''Fail every request waiting for a reply, and every one
+        expected from now on, with {error}, e.g. once the connection
+        has closed.
+        '''
+        with self._lock:
+            self._error = error
+            waiting = [pending for waiters in self._waiters.itervalues()
+                       for pending in waiters]
+            self._waiters.clear()
+        for pending in waiting:
+            pending.fail(error)
+    
+    def put(self, msg):
+        '''Hand a reply to the oldest request waiting for it.
+        
+        Returns False if nobody was waiting for it.
+        '''
+        request = msg.get(u'request')
+        key = self.key(request, msg.get(u'values'))
+        with self._lock:
+            if key not in self._waiters:
+                # Error replies to "get" requests don't echo the
+                # values, so fall back to the oldest "get" of any kind.
+                key = self._oldest_key(request)
+                if key is None:
+                    return False
+            waiters = self._waiters[key]
+            pending = waiters.popleft()
+            if not waiters:
+                del self._waiters[key]
+        pending.resolve(msg)
+        return True
+    
+    def discard(self, pending):
+        '''Stop waiting for a reply, e.g. after timing out.'''
+        with self._lock:
+            waiters = self._waiters.get(pending.key)
+            if waiters is None:
+                return
+            try:
+                waiters.remove(pending)
+            except ValueError:
+                return
+            if not waiters:
+                del self._waiters[pending.key]
+    
+    def _oldest_key(self, request):
+        oldest_key = None
+        oldest_seq = None
+        for key, waiters in self._waiters.iteritems():
+            if key[0] != request:
+                continue
+            if oldest_seq is None or waiters[0].seq < oldest_seq:
+                oldest_key = key
+                oldest_seq = waiters[0].seq
+        return oldest_key
+    
+    
+class PendingReply(object):
+    
+    '''A single request waiting on its reply.'''
+    
+    __slots__ = ('table', 'key', 'seq', 'reply', 'error', '_done')
+    
+    def __init__(self, table, key, seq):
+        self.table = table
+        self.key = key
+        self.seq = seq
+        self.reply = None
+        self.error = None
+        self._done = threading.Event()
+        
+    def resolve(self, reply):
+        self.reply = reply
+        self._done.set()
+        
+    def fail(self, error):
+        self.error = error
+        self._done.set()
+        
+    def wait(self, timeout=None):
+        '''Return the reply, or raise a TrackerTimeoutError if it has
+        not arrived within {timeout} seconds, or the error it failed
+        with.
+        '''
+        if not self._done.wait(timeout):
+            self.table.discard(self)
+            # The reply may have slipped in while we were discarding.
+            if not self._done.is_set():
+                raise TrackerTimeoutError(
+                        'reply', 'no reply to {} within {} s'.format(
+                                self.key[0], timeout
+                                ))
+        if self.error is not None:
+            raise self.error
+        return self.reply
@@ -0,0 +1,338 @@
+'''
+Ways of recording the frames pushed by the eye tribe server.
+
+Hand one of these (or a plain file object, which gets wrapped in a
+TextFrameRecorder) to EyeTribeServer.record_data_to().
+'''
+
+import json
+import logging
+import os
+import struct
+import threading
+from collections import deque
+from time import time
+
+from frames import FrameSnapshot
+
+
+class TextFrameRecorder(object):
+
+    '''Writes each message as one line of Python dict repr. This is
+    the original *_game_N_ET.txt format.
+    '''
+
+    def __init__(self, file_):
+        self.file = file_
+
+    def record(self, msg):
+        self.file.write('{}\n'.format(msg))
+
+    def record_batch(self, msgs):
+        '''Write {msgs}, and return how many there were.'''
+        self.file.writelines(['{}\n'.format(msg) for msg in msgs])
+        return len(msgs)
+
+    def flush(self):
+        self.file.flush()
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# (field name, struct format, where to find it in the frame dict)
+FRAME_FIELDS = (
+        ('time', 'q', (u'time',)),
+        ('host_time', 'd', (u'host_time',)),
+        ('state', 'i', (u'state',)),
+        ('fix', '?', (u'fix',)),
+        ('avg_x', 'f', (u'avg', u'x')),
+        ('avg_y', 'f', (u'avg', u'y')),
+        ('raw_x', 'f', (u'raw', u'x')),
+        ('raw_y', 'f', (u'raw', u'y')),
+        ('left_pcenter_x', 'f', (u'lefteye', u'pcenter', u'x')),
+        ('left_pcenter_y', 'f', (u'lefteye', u'pcenter', u'y')),
+        ('left_psize', 'f', (u'lefteye', u'psize')),
+        ('right_pcenter_x', 'f', (u'righteye', u'pcenter', u'x')),
+        ('right_pcenter_y', 'f', (u'righteye', u'pcenter', u'y')),
+        ('right_psize', 'f', (u'righteye', u'psize')),
+        )
+
+MAGIC = b'PYETRIB1'
+NAN = float('nan')
+HEADER_SIZE = 1024
+# magic, record size, number of records; the JSON field list follows.
+_HEADER = struct.Struct('<8sIQ')
+
+
+class BinaryFrameRecorder(object):
+
+    '''Writes each frame as one fixed-width little-endian record.
+
+    The file starts with a HEADER_SIZE byte header holding the record
+    size, the number of records and the field list, followed by the
+    records back to back, so read_binary_frames() can memory-map it
+    as a NumPy structured array. Space for {capacity} records is
+    preallocated and doubled whenever it runs out; the header is
+    brought up to date on every flush() and the file is trimmed on
+    close().
+    '''
+
+    def __init__(self, file_name, capacity=60*60*30, fields=FRAME_FIELDS):
+        '''Initialize the class.
+
+        Keyword arguments:
+        file_name -- where to write. Existing files are overwritten.
+        capacity -- number of records to preallocate space for
+            (default: half an hour at 60 Hz)
+        fields -- (name, struct format, path in frame) tuples
+            (default FRAME_FIELDS)
+        '''
+        self.fields = fields
+        self._paths = [path for _, _, path in fields]
+        self._struct = struct.Struct(
+                '<' + ''.join(fmt for _, fmt, _ in fields)
+                )
+        self.num_records = 0
+        self.capacity = capacity
+        self.file = open(file_name, 'wb')
+        self._write_header()
+        self.file.truncate(self._size(self.capacity))
+        self.file.seek(HEADER_SIZE)
+
+    def record(self, msg):
+        self._write([self._pack(msg)])
+
+    def record_batch(self, msgs):
+        '''Write the frames in {msgs}, skipping any that are missing a
+        field or have one of the wrong type, and return how many were
+        written.
+        '''
+        records = []
+        for msg in msgs:
+            try:
+                records.append(self._pack(msg))
+            except (KeyError, TypeError, ValueError, struct.error):
+                logging.exception('Could not record {}'.format(msg))
+        self._write(records)
+        return len(records)
+
+    def flush(self):
+        self._write_header()
+        self.file.flush()
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self._write_header()
+        self.file.truncate(self._size(self.num_records))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _pack(self, msg):
+        # One record, or an exception before anything is written.
+        frame = msg[u'values'][u'frame']
+        values = []
+        for path in self._paths:
+            value = frame
+            for key in path:
+                value = value[key]
+            if value is None:
+                # e.g. host_time, before the clocks have been synced
+                value = NAN
+            values.append(value)
+        return self._struct.pack(*values)
+
+    def _write(self, records):
+        if self.num_records + len(records) > self.capacity:
+            while self.num_records + len(records) > self.capacity:
+                self.capacity *= 2
+            self.file.truncate(self._size(self.capacity))
+        self.file.write(b''.join(records))
+        self.num_records += len(records)
+
+    def _size(self, num_records):
+        return HEADER_SIZE + num_records*self._struct.size
+
+    def _write_header(self):
+        field_list = [[name, fmt] for name, fmt, _ in self.fields]
+        header = _HEADER.pack(MAGIC, self._struct.size, self.num_records)
+        header += json.dumps(field_list, separators=(',', ':')).encode('ascii')
+        if len(header) > HEADER_SIZE:
+            raise ValueError('Too many fields for the header.')
+        position = self.file.tell()
+        self.file.seek(0)
+        self.file.write(header.ljust(HEADER_SIZE, b'\0'))
+        self.file.seek(max(position, HEADER_SIZE))
+
+
+class RecorderThread(threading.Thread):
+    
+    '''Hands frames to a recorder on a thread of its own, so that a
+    slow disk never holds up the thread receiving from the tracker.
+    
+    record() only appends to a bounded buffer. It takes messages, or
+    FrameSnapshots, whose messages are decoded in full on this thread
+    rather than the caller's. The thread writes out whatever has
+    piled up in one batch, and fsyncs at most every
+    {fsync_interval} seconds. When the buffer is full the oldest
+    frame is dropped, or with block=True the caller waits for room.
+    stop() writes out everything still buffered before the thread
+    exits; the recorder itself is flushed but left open.
+    '''
+    
+    def __init__(self, recorder, max_buffered=60*60, block=False,
+                 fsync_interval=1.0):
+        '''Initialize the class.
+        
+        Keyword arguments:
+        recorder -- a TextFrameRecorder, BinaryFrameRecorder or
+            anything else with record_batch(), which returns how many
+            frames it recorded, and flush()
+        max_buffered -- frames to buffer before dropping or blocking
+            (default one minute at 60 Hz)
+        block -- wait for room instead of dropping when full
+            (default False)
+        fsync_interval -- seconds between fsyncs, or None never to
+            fsync (default 1.0)
+        '''
+        super(RecorderThread, self).__init__()
+        self.recorder = recorder
+        self.max_buffered = max_buffered
+        self.block = block
+        self.fsync_interval = fsync_interval
+        self.recorded = 0
+        self.dropped = 0
+        # Frames that could not be decoded or recorded.
+        self.skipped = 0
+        self.blocked = 0
+        self.batches = 0
+        self._buffer = deque()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        
+    def record(self, msg):
+        with self._cond:
+            if len(self._buffer) >= self.max_buffered:
+                if self.block:
+                    self.blocked += 1
+                    while (len(self._buffer) >= self.max_buffered and
+                           not self._stop.is_set()):
+                        self._cond.wait()
+                else:
+                    self._buffer.popleft()
+                    self.dropped += 1
+            self._buffer.append(msg)
+            self._cond.notify_all()
+            
+    def flush(self):
+        '''Wait until everything recorded so far has been written,
+        then flush the recorder.
+        '''
+        with self._cond:
+            while self._buffer and self.is_alive():
+                self._cond.wait(0.1)
+        self.recorder.flush()
+        
+    def stop(self):
+        '''Set the stop flag. Buffered frames are still written.'''
+        with self._cond:
+            self._stop.set()
+            self._cond.notify_all()
+            
+    def run(self):
+        last_fsync = time()
+        while True:
+            with self._cond:
+                while not self._buffer and not self._stop.is_set():
+                    self._cond.wait()
+                if not self._buffer:
+                    break
+                batch = self._buffer
+                self._buffer = deque()
+                self._cond.notify_all()
+            msgs = self._messages(batch)
+            try:
+                recorded = self.recorder.record_batch(msgs)
+            except Exception:
+                logging.exception('Could not record {} frames.'.format(
+                        len(msgs)
+                        ))
+                self.skipped += len(batch)
+                continue
+            self.recorded += recorded
+            self.skipped += len(batch) - recorded
+            self.batches += 1
+            if (self.fsync_interval is not None and
+                time() - last_fsync >= self.fsync_interval):
+                self._sync()
+                last_fsync = time()
+        self.recorder.flush()
+        if self.dropped:
+            logging.warning('Recorder dropped {} frames.'.format(self.dropped))
+        if self.skipped:
+            logging.warning('Recorder skipped {} frames.'.format(self.skipped))
+    
+    def _messages(self, batch):
+        # Decode the snapshots, skipping any that will not decode, so
+        # one bad frame does not cost the rest of the batch.
+        msgs = []
+        for msg in batch:
+            if isinstance(msg, FrameSnapshot):
+                try:
+                    msg = msg.message()
+                except ValueError:
+                    logging.exception('Could not decode {!r}'.format(msg.raw))
+                    continue
+            msgs.append(msg)
+        return msgs
+        
+    def _sync(self):
+        self.recorder.flush()
+        try:
+            os.fsync(self.recorder.fileno())
+        except (AttributeError, OSError):
+            pass
+
+
+def read_binary_frames(file_name, mode='r'):
+    '''Memory-map a file written by BinaryFrameRecorder and return it
+    as a NumPy structured array with one named column per field.
+    '''
+    # Only analysis code needs NumPy, the recorder itself does not.
+    import numpy
+
+    with open(file_name, 'rb') as file_:
+        header = file_.read(HEADER_SIZE)
+    magic, record_size, num_records = _HEADER.unpack_from(header)
+    if magic != MAGIC:
+        raise ValueError('{} is not a binary frame file.'.format(file_name))
+    field_list = json.loads(
+            header[_HEADER.size:].rstrip(b'\0').decode('ascii')
+            )
+    dtype = numpy.dtype(
+            [(str(name), '<' + fmt) for name, fmt in field_list]
+            )
+    if dtype.itemsize != record_size:
+        raise ValueError('Corrupt header in {}.'.format(file_name))
+    if num_records == 0 or os.path.getsize(file_name) <= HEADER_SIZE:
+        return numpy.zeros(0, dtype=dtype)
+    return numpy.memmap(file_name, dtype=dtype, mode=mode,
+                        offset=HEADER_SIZE, shape=(num_records,))
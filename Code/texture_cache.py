@@ -0,0 +1,193 @@
+'''
+Images for the screens, decoded ahead of time on a background thread
+and uploaded to the GPU in the spare time between frames, so that a
+screen never waits for a PNG to be read.
+'''
+
+import logging
+import threading
+from collections import OrderedDict
+from Queue import Queue
+
+from PIL import Image
+from psychopy.visual import ImageStim
+
+# Leave this long before a vertical blank alone when uploading in the
+# time between frames.
+UPLOAD_MARGIN = 0.005
+
+
+class TextureCache(object):
+
+    '''Hands out images to draw for each image file, made from an
+    image decoded on a background thread.
+
+    preload() queues files for decoding, in the order they will be
+    needed. The ImageStims, which upload their texture to the GPU,
+    have to be made on the thread that owns the window; upload_next()
+    makes one in whatever time is left before the next frame, and
+    image_stim() makes one right away if it has to. Only the
+    {max_bytes} of textures used most recently are kept; the decoded
+    images are, so an evicted texture only needs uploading again.
+
+    There is one ImageStim per file, and only the cache holds on to
+    it. image_stim() hands out a CachedImage, which keeps where its
+    caller wants the image and asks the cache for the ImageStim
+    every time it is drawn, so callers neither keep evicted textures
+    alive nor move each other's images.
+    '''
+
+    def __init__(self, window, max_bytes=256*2**20):
+        '''Initialize the class.
+
+        Keyword arguments:
+        window -- the window the ImageStims are for
+        max_bytes -- how much texture memory to keep at most, going by
+            the images' sizes at four bytes a pixel (default 256 MiB)
+        '''
+        self.window = window
+        self.max_bytes = max_bytes
+        self.texture_bytes = 0
+        self._lock = threading.Lock()
+        # File name -> _Entry, in the order they were preloaded.
+        self._entries = OrderedDict()
+        # File names with a texture, least recently used first.
+        self._uploaded = OrderedDict()
+        self._decode_q = Queue()
+        self._decoder = threading.Thread(target=self._decode)
+        self._decoder.daemon = True
+        self._decoder.start()
+
+    def preload(self, file_names):
+        '''Decode {file_names} in the background, in that order.'''
+        with self._lock:
+            for file_name in file_names:
+                if file_name not in self._entries:
+                    self._entries[file_name] = _Entry()
+                    self._decode_q.put(file_name)
+
+    def image_stim(self, file_name, pos=(0, 0), size=None):
+        '''A CachedImage of {file_name}, at {pos} and {size} (default
+        the image's own). Its texture is made now if it has not been
+        yet, after waiting for the file to be decoded if it is being
+        decoded.
+        '''
+        entry = self._texture(file_name)
+        return CachedImage(self, file_name, pos,
+                           entry.size if size is None else size)
+
+    def draw(self, file_name, pos, size, win=None):
+        '''Draw {file_name} at {pos} and {size}, uploading it again
+        first if it has been evicted.
+        '''
+        stim = self._texture(file_name).stim
+        stim.pos = pos
+        stim.size = size
+        stim.draw(win)
+
+    def upload_next(self, time_left):
+        '''Upload the next decoded image that has no texture yet, if
+        there is one and {time_left} seconds are enough. Call it on
+        the thread that owns the window, as Screen.run() does with
+        self.frames.idle(Screen.textures.upload_next).
+        '''
+        if time_left < UPLOAD_MARGIN:
+            return
+        with self._lock:
+            waiting = [(file_name, entry)
+                       for file_name, entry in self._entries.iteritems()
+                       if entry.stim is None and entry.decoded.is_set() and
+                       entry.image is not None]
+        if not waiting:
+            return
+        width, height = waiting[0][1].image.size
+        # Uploading ahead of time should not evict anything.
+        if self.texture_bytes + width*height*4 <= self.max_bytes:
+            self._upload(*waiting[0])
+
+    def stop(self):
+        '''Stop decoding, and let go of every image and texture. The
+        cache cannot be used after this.
+        '''
+        self._decode_q.put(None)
+        with self._lock:
+            self._entries.clear()
+            self._uploaded.clear()
+            self.texture_bytes = 0
+
+    def _texture(self, file_name):
+        # The entry of {file_name}, with an ImageStim, now the most
+        # recently used.
+        self.preload([file_name])
+        entry = self._entries[file_name]
+        if entry.stim is None:
+            entry.decoded.wait()
+            self._upload(file_name, entry)
+        else:
+            with self._lock:
+                self._uploaded[file_name] = self._uploaded.pop(file_name)
+        return entry
+
+    def _upload(self, file_name, entry):
+        if entry.image is None:
+            # Could not be decoded; leave it to psychopy, as before.
+            entry.stim = ImageStim(win=self.window, image=file_name)
+        else:
+            entry.stim = ImageStim(win=self.window, image=entry.image)
+        if entry.size is None:
+            entry.size = tuple(entry.stim.size)
+        width, height = entry.size
+        with self._lock:
+            self._uploaded[file_name] = int(width*height*4)
+            self.texture_bytes += self._uploaded[file_name]
+            while self.texture_bytes > self.max_bytes and len(self._uploaded) > 1:
+                evicted, num_bytes = self._uploaded.popitem(last=False)
+                self.texture_bytes -= num_bytes
+                self._entries[evicted].stim = None
+
+    def _decode(self):
+        while True:
+            file_name = self._decode_q.get()
+            if file_name is None:
+                return
+            with self._lock:
+                entry = self._entries.get(file_name)
+            if entry is None:
+                continue
+            try:
+                image = Image.open(file_name)
+                image.load()
+                if image.mode != 'RGBA':
+                    image = image.convert('RGBA')
+                entry.image = image
+            except IOError:
+                logging.exception('Could not decode {}.'.format(file_name))
+            entry.decoded.set()
+
+
+class CachedImage(object):
+
+    '''An image from a TextureCache, where one caller wants it. Draws
+    like an ImageStim, but holds no texture of its own.
+    '''
+
+    def __init__(self, cache, file_name, pos, size):
+        self.cache = cache
+        self.file_name = file_name
+        self.pos = pos
+        self.size = size
+
+    def draw(self, win=None):
+        self.cache.draw(self.file_name, self.pos, self.size, win)
+
+
+class _Entry(object):
+
+    __slots__ = ('decoded', 'image', 'stim', 'size')
+
+    def __init__(self):
+        self.decoded = threading.Event()
+        self.image = None
+        self.stim = None
+        # The image's own size, as psychopy made the stim.
+        self.size = None
@@ -0,0 +1,387 @@
+'''
+A stand-in for the eye tribe server, for running and benchmarking the
+experiment without the physical tracker.
+
+It speaks the same JSON protocol on the same port: get/set of the
+tracker values, frames on request or pushed at the tracker's frame
+rate, the calibration requests, 800/801/802 notifications and
+heartbeats. Frames are either made up (the gaze circles the screen)
+or replayed from a recorded *_game_N_ET.txt file, in real time or
+faster.
+
+Run it on its own with
+    python tracker_simulator.py [--port 6555] [--framerate 60]
+                                [--replay data/1_game_1_ET.txt]
+                                [--speed 1.0]
+or start a TrackerSimulator from Python code.
+'''
+
+import argparse
+import json
+import socket
+import threading
+from ast import literal_eval
+from datetime import datetime
+from math import cos, sin, pi
+from SocketServer import ThreadingTCPServer, BaseRequestHandler
+from time import sleep, time
+
+BUFSIZE = 4096
+
+CALIBRATION_CHANGED = 800
+DISPLAY_CHANGED = 801
+TRACKER_STATE_CHANGED = 802
+
+# Values that can be set with a "set" request. Everything else in the
+# tracker state is read-only.
+SETTABLE = (u'push', u'version', u'screenindex', u'screenresw',
+            u'screenresh', u'screenpsyw', u'screenpsyh')
+
+
+def load_recorded_frames(file_name):
+    '''Read the frames out of a file written by TextFrameRecorder.'''
+    frames = []
+    with open(file_name) as file_:
+        for line in file_:
+            line = line.strip()
+            if line == '':
+                continue
+            msg = literal_eval(line)
+            frames.append(msg[u'values'][u'frame'])
+    return frames
+
+
+def make_frame(time_ms, x, y, state=7, fix=False):
+    '''A frame in the format the eye tribe server sends them.
+    {time_ms} is in milliseconds since the epoch.
+    '''
+    timestamp = datetime.fromtimestamp(time_ms/1000.0)
+    eye = {u'raw': {u'x': x, u'y': y},
+           u'avg': {u'x': x, u'y': y},
+           u'psize': 20.0,
+           u'pcenter': {u'x': 0.5, u'y': 0.5}}
+    lefteye = dict(eye, pcenter={u'x': 0.45, u'y': 0.5})
+    righteye = dict(eye, pcenter={u'x': 0.55, u'y': 0.5})
+    return {u'timestamp': timestamp.isoformat(' ')[:-3],
+            u'time': time_ms,
+            u'fix': fix,
+            u'state': state,
+            u'raw': {u'x': x, u'y': y},
+            u'avg': {u'x': x, u'y': y},
+            u'lefteye': lefteye,
+            u'righteye': righteye}
+
+
+class TrackerSimulator(object):
+
+    '''Serves the eye tribe API from a background thread.'''
+
+    def __init__(self,
+                 host='localhost',
+                 port=6555,
+                 framerate=60,
+                 replay=None,
+                 speed=1.0,
+                 screenres=(1920, 1080)):
+        '''Initialize the class.
+
+        Keyword arguments:
+        host, port -- where to listen. Port 0 picks a free port, see
+            self.port. (default localhost:6555)
+        framerate -- frames per second, 30 or 60 (default 60)
+        replay -- a list of frame dicts, or the name of a recorded
+            *_ET.txt file, to replay in a loop instead of made-up
+            frames (default None)
+        speed -- how many times faster than real time to run
+            (default 1.0)
+        screenres -- (width, height) of the screen (default 1920x1080)
+        '''
+        self.framerate = framerate
+        self.speed = speed
+        if isinstance(replay, basestring):
+            replay = load_recorded_frames(replay)
+        self.replay = replay
+        self.values = {
+                u'push': False,
+                u'heartbeatinterval': 3000,
+                u'version': 1,
+                u'trackerstate': 0,
+                u'framerate': framerate,
+                u'iscalibrated': False,
+                u'iscalibrating': False,
+                u'calibresult': None,
+                u'screenindex': 0,
+                u'screenresw': screenres[0],
+                u'screenresh': screenres[1],
+                u'screenpsyw': 0.5,
+                u'screenpsyh': 0.3}
+        self.frame = make_frame(int(time()*1000), 0.0, 0.0)
+        self.frames_sent = 0
+        self.lock = threading.Lock()
+        self.clients = []
+        self._calib_points = []
+        self._calib_point_count = 0
+        self._stop = threading.Event()
+
+        class Handler(TrackerConnection):
+            simulator = self
+        ThreadingTCPServer.allow_reuse_address = True
+        self.server = ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+
+    def start(self):
+        '''Start serving and generating frames in the background.'''
+        for target in (self.server.serve_forever, self._generate_frames):
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.server.shutdown()
+        self.server.server_close()
+        with self.lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.close()
+
+    def notify(self, statuscode):
+        '''Send a state change notification to every client.'''
+        self._broadcast({u'category': u'tracker',
+                         u'statuscode': statuscode})
+
+    def set_tracker_state(self, state):
+        self.values[u'trackerstate'] = state
+        self.notify(TRACKER_STATE_CHANGED)
+
+    def _broadcast(self, msg, only_push=False):
+        with self.lock:
+            clients = list(self.clients)
+        for client in clients:
+            if only_push and not client.push:
+                continue
+            client.send(msg)
+
+    def _generate_frames(self):
+        interval = 1.0/self.framerate
+        next_time = time()
+        i = 0
+        while not self._stop.is_set():
+            if self.replay:
+                frame = self.replay[i % len(self.replay)]
+                following = self.replay[(i+1) % len(self.replay)]
+                step = (following[u'time'] - frame[u'time'])/1000.0
+                if not 0 < step < 1:
+                    step = interval
+            else:
+                # Made-up frames are stamped with the host clock, so
+                # benchmarks can tell how long they took to arrive.
+                angle = 2*pi*i/(2*self.framerate)
+                frame = make_frame(
+                        int(time()*1000),
+                        self.values[u'screenresw']*(0.5 + 0.3*cos(angle)),
+                        self.values[u'screenresh']*(0.5 + 0.3*sin(angle))
+                        )
+                step = interval
+            self.frame = frame
+            self.frames_sent += 1
+            self._broadcast(self.frame_msg(u'get'), only_push=True)
+            i += 1
+            next_time += step/self.speed
+            delay = next_time - time()
+            if delay > 0:
+                sleep(delay)
+            else:
+                next_time = time()
+
+    def frame_msg(self, request):
+        return {u'category': u'tracker', u'request': request,
+                u'statuscode': 200, u'values': {u'frame': self.frame}}
+
+    def handle(self, client, msg):
+        '''Return the reply to one message from a client.'''
+        category = msg.get(u'category')
+        request = msg.get(u'request')
+        if category == u'heartbeat':
+            return {u'category': u'heartbeat', u'statuscode': 200}
+        elif category == u'tracker':
+            return self._handle_tracker(client, request, msg.get(u'values'))
+        elif category == u'calibration':
+            return self._handle_calibration(request, msg.get(u'values'))
+        return {u'category': category, u'request': request,
+                u'statuscode': 400,
+                u'values': {u'statusmessage': u'Unknown category'}}
+
+    def _handle_tracker(self, client, request, values):
+        reply = {u'category': u'tracker', u'request': request,
+                 u'statuscode': 200}
+        if request == u'get':
+            if not isinstance(values, list):
+                return _invalid(reply)
+            if u'frame' in values:
+                return self.frame_msg(u'get')
+            reply[u'values'] = {}
+            for key in values:
+                if key not in self.values:
+                    return dict(reply, statuscode=403)
+                reply[u'values'][key] = self.values[key]
+        elif request == u'set':
+            if not isinstance(values, dict):
+                return _invalid(reply)
+            for key, value in values.iteritems():
+                if key not in SETTABLE:
+                    return dict(reply, statuscode=403)
+                if key == u'push':
+                    client.push = value
+                else:
+                    self.values[key] = value
+                    if key == u'screenindex':
+                        self.notify(DISPLAY_CHANGED)
+        else:
+            reply[u'statuscode'] = 400
+        return reply
+
+    def _handle_calibration(self, request, values):
+        reply = {u'category': u'calibration', u'request': request,
+                 u'statuscode': 200}
+        calibrating = self.values[u'iscalibrating']
+        if request == u'start':
+            if not isinstance(values, dict) or u'pointcount' not in values:
+                return _invalid(reply)
+            if calibrating:
+                return dict(reply, statuscode=403)
+            self._calib_point_count = values[u'pointcount']
+            self._calib_points = []
+            self.values[u'iscalibrating'] = True
+        elif request == u'pointstart':
+            if (not isinstance(values, dict) or
+                u'x' not in values or u'y' not in values):
+                return _invalid(reply)
+            if not calibrating:
+                return dict(reply, statuscode=403)
+            self._calib_points.append((values[u'x'], values[u'y']))
+        elif request == u'pointend':
+            if not calibrating or not self._calib_points:
+                return dict(reply, statuscode=403)
+            if len(self._calib_points) >= self._calib_point_count:
+                result = self._calibresult()
+                self.values[u'iscalibrating'] = False
+                self.values[u'iscalibrated'] = True
+                self.values[u'calibresult'] = result
+                reply[u'values'] = {u'calibresult': result}
+                self.notify(CALIBRATION_CHANGED)
+        elif request == u'abort':
+            self.values[u'iscalibrating'] = False
+        elif request == u'clear':
+            self.values[u'iscalibrated'] = False
+            self.values[u'calibresult'] = None
+            self.notify(CALIBRATION_CHANGED)
+        else:
+            reply[u'statuscode'] = 400
+        return reply
+
+    def _calibresult(self):
+        calibpoints = []
+        for x, y in self._calib_points:
+            calibpoints.append({
+                    u'state': 2,
+                    u'cp': {u'x': x, u'y': y},
+                    u'mecp': {u'x': x, u'y': y},
+                    u'acd': {u'ad': 0.5, u'adl': 0.5, u'adr': 0.5},
+                    u'mepix': {u'mep': 10.0, u'mepl': 10.0, u'mepr': 10.0},
+                    u'asdp': {u'asd': 5.0, u'asdl': 5.0, u'asdr': 5.0}})
+        return {u'result': True, u'deg': 0.5, u'degl': 0.5,
+                u'degr': 0.5, u'calibpoints': calibpoints}
+
+
+class TrackerConnection(BaseRequestHandler):
+
+    '''One client of the TrackerSimulator.'''
+
+    simulator = None
+
+    def setup(self):
+        self.push = False
+        self.send_lock = threading.Lock()
+        with self.simulator.lock:
+            self.simulator.clients.append(self)
+
+    def finish(self):
+        with self.simulator.lock:
+            if self in self.simulator.clients:
+                self.simulator.clients.remove(self)
+
+    def send(self, msg):
+        data = json.dumps(msg) + '\n'
+        try:
+            with self.send_lock:
+                self.request.sendall(data)
+        except socket.error:
+            pass
+
+    def close(self):
+        try:
+            self.request.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+
+    def handle(self):
+        # Clients don't terminate their messages, so we have to find
+        # where each JSON object ends.
+        decoder = json.JSONDecoder()
+        pending = ''
+        while True:
+            try:
+                data = self.request.recv(BUFSIZE)
+            except socket.error:
+                return
+            if not data:
+                return
+            pending += data
+            while True:
+                pending = pending.lstrip()
+                if pending == '':
+                    break
+                try:
+                    msg, end = decoder.raw_decode(pending)
+                except ValueError:
+                    break
+                pending = pending[end:]
+                self.send(self.simulator.handle(self, msg))
+
+
+def _invalid(reply):
+    # What the tracker answers a request missing its values with.
+    return dict(reply, statuscode=400,
+                values={u'statusmessage': u'Invalid request'})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=6555)
+    parser.add_argument('--framerate', type=int, default=60,
+                        choices=[30, 60])
+    parser.add_argument('--replay', default=None,
+                        help='a recorded *_game_N_ET.txt file')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='replay this many times faster')
+    args = parser.parse_args()
+    simulator = TrackerSimulator(
+            host=args.host, port=args.port, framerate=args.framerate,
+            replay=args.replay, speed=args.speed
+            ).start()
+    print('Simulating the eye tribe server on port {}.'.format(
+            simulator.port
+            ))
+    try:
+        while True:
+            sleep(1)
+    except KeyboardInterrupt:
+        simulator.stop()
+
+
+if __name__ == '__main__':
+    main()